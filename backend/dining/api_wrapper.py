@@ -1,21 +1,37 @@
 import datetime
+import hashlib
 import json
+from concurrent.futures import ThreadPoolExecutor
 
-import requests
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from django.utils import timezone
 from django.utils.timezone import make_aware
 from requests.exceptions import ConnectTimeout, ReadTimeout
+from rest_framework.renderers import JSONRenderer
 
-from dining.models import DiningItem, DiningMenu, DiningStation, Venue
+from dining.models import MENUS_CACHE_KEY, DiningItem, DiningMenu, DiningStation, Venue
+from utils import http
+from utils.cache import Cache
 from utils.errors import APIError
+from utils.tokens import SharedTokenMixin
 
 
 OPEN_DATA_URL = "https://3scale-public-prod-open-data.apps.k8s.upenn.edu/api/v1/dining/"
 OPEN_DATA_ENDPOINTS = {"VENUES": OPEN_DATA_URL + "venues", "MENUS": OPEN_DATA_URL + "menus"}
+MENU_MAX_WORKERS = 8
+# sync_menus keeps this many days of menus up to date, starting today
+MENU_SYNC_DAYS = 7
 
+VENUES_CACHE_KEY = "dining:venues"
+# refreshed every hour by refresh_venues, this only matters if that job keeps failing
+VENUES_CACHE_TIMEOUT = 12 * Cache.HOUR
+
+
+class DiningAPIWrapper(SharedTokenMixin):
+    token_cache_key = "dining:token"
 
-class DiningAPIWrapper:
     def __init__(self):
         self.token = None
         self.expiration = timezone.localtime()
@@ -23,19 +39,16 @@ class DiningAPIWrapper:
             "https://sso.apps.k8s.upenn.edu/auth/realms/master/protocol/openid-connect/token"
         )
 
-    def update_token(self):
-        if self.expiration > timezone.localtime():
-            return
+    def fetch_token(self):
         body = {
             "client_id": settings.DINING_ID,
             "client_secret": settings.DINING_SECRET,
             "grant_type": "client_credentials",
         }
-        response = requests.post(self.openid_endpoint, data=body).json()
+        response = http.post(self.openid_endpoint, data=body).json()
         if "error" in response:
             raise APIError(f"Dining: {response['error']}, {response.get('error_description')}")
-        self.expiration = timezone.localtime() + datetime.timedelta(seconds=response["expires_in"])
-        self.token = response["access_token"]
+        return response["access_token"], response["expires_in"]
 
     def request(self, *args, **kwargs):
         """Make a signed request to the dining API."""
@@ -50,7 +63,7 @@ class DiningAPIWrapper:
             kwargs["headers"] = headers
 
         try:
-            return requests.request(*args, **kwargs)
+            return http.request(*args, **kwargs)
         except (ConnectTimeout, ReadTimeout, ConnectionError):
             raise APIError("Dining: Connection timeout")
 
@@ -61,10 +74,11 @@ class DiningAPIWrapper:
         if response.status_code != 200:
             raise APIError("Dining: Error connecting to API")
         venues = response.json()["result_data"]["campuses"]["203"]["cafes"]
+        known_venues = Venue.objects.in_bulk([int(key) for key in venues])
         for key, value in venues.items():
             # Cleaning up json response
-            venue = Venue.objects.filter(venue_id=key).first()
-            value["name"] = venue.name
+            venue = known_venues.get(int(key))
+            value["name"] = venue.name if venue else None
             value["image"] = venue.image_url if venue else None
 
             value["id"] = int(key)
@@ -107,56 +121,149 @@ class DiningAPIWrapper:
             results.append(value)
         return results
 
-    def load_menu(self, date=timezone.now().date()):
+    def refresh_venues(self):
+        """Renders the venues and their hours ahead of time for the Venues route"""
+        content = JSONRenderer().render(self.get_venues())
+        cache.set(VENUES_CACHE_KEY, content, VENUES_CACHE_TIMEOUT)
+        return content
+
+    def get_menu(self, venue, date):
+        menu_base = OPEN_DATA_ENDPOINTS["MENUS"]
+        return self.request("GET", f"{menu_base}?cafe={venue.venue_id}&date={date}").json()
+
+    def load_menu(self, date=None):
         """
-        Loads the weeks menu starting from today
+        Loads the menus for a single day, today by default
         NOTE: This method should only be used in load_next_menu.py, which is
         run based on a cron job every day
         """
+        return self.sync_menus(date or timezone.now().date())
+
+    def sync_menus(self, start, end=None):
+        """
+        Syncs the menus of every venue from `start` to `end` (inclusive) with the API and
+        returns the number of menus written. Each (venue, date, service) is hashed and only
+        the ones whose content changed are rewritten, so this is cheap to run repeatedly.
+        """
 
         # Venues without a menu should not be parsed
         skipped_venues = [747, 1163, 1731, 1732, 1733, 1464004, 1464009]
 
         # TODO: Handle API responses during empty menus (holidays)
-        menu_base = OPEN_DATA_ENDPOINTS["MENUS"]
         venues = [v for v in Venue.objects.all() if v.venue_id not in skipped_venues]
-        for venue in venues:
-            response = self.request("GET", f"{menu_base}?cafe={venue.venue_id}&date={date}").json()
-            # Load new items into database
-            # TODO: There is something called a "goitem" for venues like English House.
-            # We are currently not loading them in
-            self.load_items(response["menus"]["items"])
+        dates = [
+            start + datetime.timedelta(days=i) for i in range(((end or start) - start).days + 1)
+        ]
+        if not venues:
+            return 0
+
+        # fetch every venue at once, the token is shared so get it before fanning out
+        self.update_token()
+        requests = [(venue, date) for date in dates for venue in venues]
+        with ThreadPoolExecutor(max_workers=min(len(requests), MENU_MAX_WORKERS)) as executor:
+            responses = list(executor.map(lambda request: self.get_menu(*request), requests))
 
+        # TODO: There is something called a "goitem" for venues like English House.
+        # We are currently not loading them in
+        items, dayparts, loaded = {}, {}, set()
+        for (venue, _), response in zip(requests, responses):
+            items.update(response["menus"]["items"])
             menu = response["menus"]["days"][0]
-            dayparts = menu["cafes"][str(venue.venue_id)]["dayparts"][0]
-            for daypart in dayparts:
-                # Parse the dates in data
-                for time in ["starttime", "endtime"]:
-                    daypart[time] = make_aware(
-                        datetime.datetime.strptime(
-                            menu["date"] + "T" + daypart[time], "%Y-%m-%dT%H:%M"
-                        )
-                    )
-                dining_menu = DiningMenu.objects.create(
-                    venue=venue,
-                    date=menu["date"],
-                    start_time=daypart["starttime"],
-                    end_time=daypart["endtime"],
-                    service=daypart["label"],
+            date = datetime.date.fromisoformat(menu["date"])
+            loaded.add((venue.venue_id, date))
+            for daypart in menu["cafes"][str(venue.venue_id)]["dayparts"][0]:
+                dayparts[(venue.venue_id, date, daypart["label"])] = daypart
+
+        existing = {
+            (menu["venue_id"], menu["date"], menu["service"]): menu
+            for menu in DiningMenu.objects.filter(
+                venue__in=venues, date__in={date for _, date in loaded}
+            ).values("id", "venue_id", "date", "service", "content_hash")
+        }
+        # services that were dropped from a day we just loaded
+        stale = [
+            menu["id"]
+            for key, menu in existing.items()
+            if key[:2] in loaded and key not in dayparts
+        ]
+
+        # build the changed menus, stations and station items in memory, then write them in bulk
+        menus, stations, station_items, changed_items = [], [], [], set()
+        for (venue_id, date, service), daypart in dayparts.items():
+            daypart_items = {
+                int(item) for station in daypart["stations"] for item in station["items"]
+            }
+            content_hash = hashlib.sha256(
+                json.dumps(
+                    [daypart, [items.get(str(item)) for item in sorted(daypart_items)]],
+                    sort_keys=True,
+                ).encode()
+            ).hexdigest()
+            if (venue_id, date, service) in existing and (
+                existing[(venue_id, date, service)]["content_hash"] == content_hash
+            ):
+                continue
+
+            changed_items |= daypart_items
+            # Parse the dates in data
+            start_time, end_time = (
+                make_aware(datetime.datetime.strptime(f"{date}T{daypart[time]}", "%Y-%m-%dT%H:%M"))
+                for time in ["starttime", "endtime"]
+            )
+            dining_menu = DiningMenu(
+                venue_id=venue_id,
+                date=date,
+                start_time=start_time,
+                end_time=end_time,
+                service=service,
+                content_hash=content_hash,
+            )
+            menus.append(dining_menu)
+            # Append stations to dining menu
+            for station_data in daypart["stations"]:
+                station = DiningStation(name=station_data["label"], menu=dining_menu)
+                stations.append(station)
+                station_items.append((station, {int(item) for item in station_data["items"]}))
+
+        if not menus and not stale:
+            return 0
+
+        with transaction.atomic():
+            # Load new items into database
+            self.load_items(
+                {key: value for key, value in items.items() if int(key) in changed_items}
+            )
+            known_items = set(
+                DiningItem.objects.filter(item_id__in=changed_items).values_list(
+                    "item_id", flat=True
                 )
-                # Append stations to dining menu
-                self.load_stations(daypart["stations"], dining_menu)
-
-    def load_stations(self, station_response, dining_menu):
-        for station_data in station_response:
-            # TODO: This is inefficient for venues such as Houston Market
-            station = DiningStation.objects.create(name=station_data["label"], menu=dining_menu)
-            item_ids = [int(item) for item in station_data["items"]]
-
-            # Bulk add the items into the station
-            items = DiningItem.objects.filter(item_id__in=item_ids)
-            station.items.add(*items)
-            station.save()
+            )
+
+            DiningMenu.objects.filter(id__in=stale).delete()
+            # changed menus keep their row, but their stations are rebuilt from scratch
+            DiningStation.objects.filter(
+                menu__in=[
+                    existing[key]["id"]
+                    for key in ((m.venue_id, m.date, m.service) for m in menus)
+                    if key in existing
+                ]
+            ).delete()
+            DiningMenu.objects.bulk_create(
+                menus,
+                update_conflicts=True,
+                unique_fields=["venue", "date", "service"],
+                update_fields=["start_time", "end_time", "content_hash"],
+            )
+            DiningStation.objects.bulk_create(stations)
+            DiningStation.items.through.objects.bulk_create(
+                [
+                    DiningStation.items.through(diningstation=station, diningitem_id=item_id)
+                    for station, item_ids in station_items
+                    for item_id in item_ids & known_items
+                ]
+            )
+        cache.delete_many([MENUS_CACHE_KEY.format(date=date) for _, date in loaded])
+        return len(menus)
 
     def load_items(self, item_response):
         item_list = [
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from dining.api_wrapper import DiningAPIWrapper
+
+
+class Command(BaseCommand):
+    """
+    Refreshes the cached venues and their hours served by the Venues route
+    """
+
+    def handle(self, *args, **kwargs):
+        DiningAPIWrapper().refresh_venues()
+        self.stdout.write("Refreshed Dining Venues!")
@@ -0,0 +1,24 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from dining.api_wrapper import MENU_SYNC_DAYS, DiningAPIWrapper
+
+
+class Command(BaseCommand):
+    """
+    Syncs the menus of the next few days with the dining API. Only menus that changed
+    since the last sync are rewritten, so this can safely run several times a day.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=MENU_SYNC_DAYS, help="Number of days to sync"
+        )
+
+    def handle(self, *args, **kwargs):
+        start = timezone.now().date()
+        end = start + datetime.timedelta(days=kwargs["days"] - 1)
+        count = DiningAPIWrapper().sync_menus(start, end)
+        self.stdout.write(f"Synced {count} dining menus!")
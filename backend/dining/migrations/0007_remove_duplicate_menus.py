@@ -0,0 +1,31 @@
+# Generated by Django 5.0.2 on 2026-10-17 03:42
+
+from django.db import migrations
+from django.db.models import Max
+
+
+def remove_duplicate_menus(apps, schema_editor):
+    """
+    Re-running load_next_menu used to load a venue's menus twice. Keeps the latest copy
+    of every (venue, date, service) so the next migration can add a unique constraint.
+    """
+
+    DiningMenu = apps.get_model("dining", "DiningMenu")
+
+    latest = (
+        DiningMenu.objects.values("venue", "date", "service")
+        .annotate(latest=Max("id"))
+        .values_list("latest", flat=True)
+    )
+    DiningMenu.objects.exclude(id__in=list(latest)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dining", "0006_remove_diningmenu_stations_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_menus, migrations.RunPython.noop),
+    ]
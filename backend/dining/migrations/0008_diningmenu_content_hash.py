@@ -0,0 +1,24 @@
+# Generated by Django 5.0.2 on 2026-10-17 03:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dining", "0007_remove_duplicate_menus"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="diningmenu",
+            name="content_hash",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name="diningmenu",
+            constraint=models.UniqueConstraint(
+                fields=("venue", "date", "service"), name="unique_menu_venue_date_service"
+            ),
+        ),
+    ]
@@ -2,6 +2,10 @@ from django.db import models
 from django.utils import timezone
 
 
+# pre-rendered JSON of a day's menus, cleared by the menu loader
+MENUS_CACHE_KEY = "dining:menus:{date}"
+
+
 class Venue(models.Model):
     venue_id = models.IntegerField(primary_key=True)
     name = models.CharField(max_length=255, null=True)
@@ -37,3 +41,12 @@ class DiningMenu(models.Model):
     start_time = models.DateTimeField()
     end_time = models.DateTimeField()
     service = models.CharField(max_length=255)
+    # hash of the API data this menu was loaded from, to skip rewriting unchanged menus
+    content_hash = models.CharField(max_length=64, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["venue", "date", "service"], name="unique_menu_venue_date_service"
+            )
+        ]
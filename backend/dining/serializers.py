@@ -39,4 +39,9 @@ class DiningMenuSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = DiningMenu
-        fields = "__all__"
+        # content_hash is only used by sync_menus
+        exclude = ("content_hash",)
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related("venue").prefetch_related("stations__items")
@@ -2,16 +2,16 @@ import datetime
 
 from django.core.cache import cache
 from django.db.models import Count
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.utils.timezone import make_aware
-from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from dining.api_wrapper import APIError, DiningAPIWrapper
-from dining.models import DiningMenu, Venue
+from dining.api_wrapper import MENU_SYNC_DAYS, VENUES_CACHE_KEY, APIError, DiningAPIWrapper
+from dining.models import MENUS_CACHE_KEY, DiningMenu, Venue
 from dining.serializers import DiningMenuSerializer
 from utils.cache import Cache
 
@@ -25,30 +25,54 @@ class Venues(APIView):
     """
 
     def get(self, request):
-        try:
-            return Response(d.get_venues())
-        except APIError as e:
-            return Response({"error": str(e)}, status=400)
+        if (content := cache.get(VENUES_CACHE_KEY)) is None:
+            try:
+                content = d.refresh_venues()
+            except APIError as e:
+                return Response({"error": str(e)}, status=400)
+        return HttpResponse(content, content_type="application/json")
 
 
-class Menus(generics.ListAPIView):
+class Menus(APIView):
     """
     GET: returns list of menus, defaulted to all objects within the week,
     and can specify the filter for a particular day
     """
 
-    serializer_class = DiningMenuSerializer
-
-    def get_queryset(self):
+    def get(self, request, date=None):
         # TODO: We only have data for the next week, so we should 404
-        # if date_param is out of bounds
-        if date_param := self.kwargs.get("date"):
-            date = make_aware(datetime.datetime.strptime(date_param, "%Y-%m-%d"))
-            return DiningMenu.objects.filter(date=date)
+        # if date is out of bounds
+        start_date = timezone.now().date()
+        # only the days that sync_menus keeps up to date are cached, it clears them on changes
+        sync_dates = {start_date + datetime.timedelta(days=i) for i in range(MENU_SYNC_DAYS)}
+        if date:
+            dates = [datetime.datetime.strptime(date, "%Y-%m-%d").date()]
         else:
-            start_date = timezone.now().date()
-            end_date = start_date + datetime.timedelta(days=6)
-            return DiningMenu.objects.filter(date__gte=start_date, date__lte=end_date)
+            dates = sorted(sync_dates)
+
+        keys = {MENUS_CACHE_KEY.format(date=date): date for date in dates}
+        cached = cache.get_many([key for key, date in keys.items() if date in sync_dates])
+        if missing := {key: date for key, date in keys.items() if key not in cached}:
+            rendered = self.render_menus(missing.values())
+            missing = {key: rendered[date] for key, date in missing.items()}
+            cache.set_many(
+                {key: value for key, value in missing.items() if keys[key] in sync_dates},
+                Cache.DAY,
+            )
+            cached.update(missing)
+
+        # every day is a rendered JSON list, splice their contents into a single list
+        content = b",".join(cached[key][1:-1] for key in keys if cached[key] != b"[]")
+        return HttpResponse(b"[" + content + b"]", content_type="application/json")
+
+    def render_menus(self, dates):
+        menus = DiningMenuSerializer.setup_eager_loading(
+            DiningMenu.objects.filter(date__in=dates).order_by("date", "start_time", "id")
+        )
+        by_date = {date: [] for date in dates}
+        for menu, data in zip(menus, DiningMenuSerializer(menus, many=True).data):
+            by_date[menu.date].append(data)
+        return {date: JSONRenderer().render(data) for date, data in by_date.items()}
 
 
 class Preferences(APIView):
@@ -1,9 +1,9 @@
 import datetime
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from random import randint
 
-import requests
 from bs4 import BeautifulSoup
 from django.conf import settings
 from django.contrib.auth import get_user_model
@@ -15,7 +15,10 @@ from requests.exceptions import ConnectionError, ConnectTimeout, ReadTimeout
 
 from gsr_booking.models import GSR, GroupMembership, GSRBooking, Reservation
 from gsr_booking.serializers import GSRBookingSerializer, GSRSerializer
+from utils import http
+from utils.cache import bump_version, get_or_set_coalesced, get_version
 from utils.errors import APIError
+from utils.tokens import SharedTokenMixin
 
 
 User = get_user_model()
@@ -32,6 +35,22 @@ ROOM_BLACKLIST = {7176, 16970, 16998, 17625}
 WHARTON_CREDIT_LIMIT = 6
 LIBCAL_CREDIT_LIMIT = 6
 
+# upper bound on concurrent upstream calls when fetching every location at once
+AVAILABILITY_MAX_WORKERS = 8
+
+# keep availability just long enough to absorb polling
+AVAILABILITY_CACHE_TIMEOUT = 30
+
+
+def availability_cache_key(kind, location, *args):
+    prefix = f"gsr_availability:{kind}:{location}"
+    return ":".join([prefix, str(get_version(prefix)), *[str(arg) for arg in args]])
+
+
+def invalidate_availability(kind, location):
+    """Drops every cached availability for a location, regardless of date range"""
+    bump_version(f"gsr_availability:{kind}:{location}")
+
 
 class CreditType(Enum):
     LIBCAL = "Libcal"
@@ -64,7 +83,7 @@ class WhartonBookingWrapper(AbstractBookingWrapper):
         kwargs["headers"] = {"Authorization": f"Token {settings.WHARTON_TOKEN}"}
 
         try:
-            response = requests.request(*args, **kwargs)
+            response = http.request(*args, **kwargs)
         except (ConnectTimeout, ReadTimeout, ConnectionError):
             raise APIError("Wharton: Connection timeout")
 
@@ -104,9 +123,14 @@ class WhartonBookingWrapper(AbstractBookingWrapper):
             else current_time.date()
         )
 
-        # hits availability route for a given lid and date
+        # hits availability route for a given lid and date, the response depends on the
+        # user's privileges so it's only shared between that user's requests
         url = f"{WHARTON_URL}{user.username}/availability/{lid}/{str(search_date)}"
-        rooms = self.request("GET", url).json()
+        rooms = get_or_set_coalesced(
+            availability_cache_key(GSR.KIND_WHARTON, lid, search_date, user.username),
+            lambda: self.request("GET", url).json(),
+            AVAILABILITY_CACHE_TIMEOUT,
+        )
 
         if "closed" in rooms and rooms["closed"]:
             return []
@@ -163,27 +187,25 @@ class WhartonBookingWrapper(AbstractBookingWrapper):
             return None
 
 
-class LibCalBookingWrapper(AbstractBookingWrapper):
+class LibCalBookingWrapper(SharedTokenMixin, AbstractBookingWrapper):
+    token_cache_key = "gsr_booking:libcal_token"
+
     def __init__(self):
         self.token = None
         self.expiration = timezone.localtime()
 
-    def update_token(self):
-        # does not get new token if the current one is still usable
-        if self.expiration > timezone.localtime():
-            return
+    def fetch_token(self):
         body = {
             "client_id": settings.LIBCAL_ID,
             "client_secret": settings.LIBCAL_SECRET,
             "grant_type": "client_credentials",
         }
 
-        response = requests.post(f"{API_URL}/1.1/oauth/token", body).json()
+        response = http.post(f"{API_URL}/1.1/oauth/token", body).json()
 
         if "error" in response:
             raise APIError(f"LibCal: {response['error']}, {response.get('error_description')}")
-        self.expiration = timezone.localtime() + datetime.timedelta(seconds=response["expires_in"])
-        self.token = response["access_token"]
+        return response["access_token"], response["expires_in"]
 
     def request(self, *args, **kwargs):
         """Make a signed request to the libcal API."""
@@ -198,7 +220,7 @@ class LibCalBookingWrapper(AbstractBookingWrapper):
             kwargs["headers"] = headers
 
         try:
-            return requests.request(*args, **kwargs)
+            return http.request(*args, **kwargs)
         except (ConnectTimeout, ReadTimeout, ConnectionError):
             raise APIError("LibCal: Connection timeout")
 
@@ -259,6 +281,14 @@ class LibCalBookingWrapper(AbstractBookingWrapper):
 
     def get_availability(self, gid, start, end, user):
         """Returns a list of rooms and their availabilities"""
+        return get_or_set_coalesced(
+            availability_cache_key(GSR.KIND_LIBCAL, gid, start, end),
+            lambda: self.fetch_availability(gid, start, end),
+            AVAILABILITY_CACHE_TIMEOUT,
+        )
+
+    def fetch_availability(self, gid, start, end):
+        """Fetches availability from LibCal, bypassing the cache"""
 
         # adjusts url based on start and end times
         range_str = "availability"
@@ -451,6 +481,10 @@ class BookingHandler:
                 f"{str(e)}. Was only able to book {start.strftime('%H:%M')}"
                 f" - {curr_start.strftime('%H:%M')}"
             )
+        finally:
+            # don't keep showing the slots we just took
+            if curr_start > start:
+                self.invalidate_availability(gsr)
 
         return reservation
 
@@ -469,6 +503,7 @@ class BookingHandler:
 
             gsr_booking.is_cancelled = True
             gsr_booking.save()
+            self.invalidate_availability(gsr_booking.gsr)
 
             reservation = gsr_booking.reservation
             if all(booking.is_cancelled for booking in reservation.gsrbooking_set.all()):
@@ -483,23 +518,68 @@ class BookingHandler:
                     pass
             raise APIError("Error: Unknown booking id")
 
-    def get_availability(self, lid, gid, start, end, user, group=None):
-        gsr = get_object_or_404(GSR, gid=gid)
+    def invalidate_availability(self, gsr):
+        if gsr.kind == GSR.KIND_WHARTON:
+            invalidate_availability(gsr.kind, gsr.lid)
+        else:
+            invalidate_availability(gsr.kind, gsr.gid)
 
-        # select a random user from the group if booking wharton gsr
-        if gsr.kind == GSR.KIND_WHARTON and group is not None:
-            wharton_members = group.memberships.filter(is_wharton=True)
-            if (n := wharton_members.count()) == 0:
-                raise APIError("Error: Non Wharton cannot book Wharton GSR")
-            user = wharton_members[randint(0, n - 1)].user
+    def get_wharton_group_user(self, group):
+        """Selects a random Wharton user from the group to book Wharton GSRs with"""
+        wharton_members = group.memberships.filter(is_wharton=True)
+        if (n := wharton_members.count()) == 0:
+            raise APIError("Error: Non Wharton cannot book Wharton GSR")
+        return wharton_members[randint(0, n - 1)].user
 
+    def get_gsr_availability(self, gsr, lid, start, end, user):
+        """Fetches availability for a single location, only hits the upstream API"""
         rooms = (
             self.WBW.get_availability(lid, start, end, user)
             if gsr.kind == GSR.KIND_WHARTON
-            else self.LBW.get_availability(gid, start, end, user)
+            else self.LBW.get_availability(gsr.gid, start, end, user)
         )
         return {"name": gsr.name, "gid": gsr.gid, "rooms": rooms}
 
+    def get_availability(self, lid, gid, start, end, user, group=None):
+        gsr = get_object_or_404(GSR, gid=gid)
+
+        # select a random user from the group if booking wharton gsr
+        if gsr.kind == GSR.KIND_WHARTON and group is not None:
+            user = self.get_wharton_group_user(group)
+
+        return self.get_gsr_availability(gsr, lid, start, end, user)
+
+    def get_all_availability(self, start, end, user, group=None):
+        """
+        Returns availability for every location in one list. Upstream calls are made
+        concurrently, so this takes as long as the slowest location. A location whose
+        upstream call fails is returned without rooms and with an error message.
+        """
+        gsrs = list(GSR.objects.all())
+        if len(gsrs) == 0:
+            return []
+
+        # resolve everything that touches the database before fanning out
+        wharton_user, wharton_error = user, None
+        if group is not None and any(gsr.kind == GSR.KIND_WHARTON for gsr in gsrs):
+            try:
+                wharton_user = self.get_wharton_group_user(group)
+            except APIError as e:
+                wharton_error = e
+
+        def fetch(gsr):
+            try:
+                if gsr.kind == GSR.KIND_WHARTON:
+                    if wharton_error is not None:
+                        raise wharton_error
+                    return self.get_gsr_availability(gsr, gsr.lid, start, end, wharton_user)
+                return self.get_gsr_availability(gsr, gsr.lid, start, end, user)
+            except APIError as e:
+                return {"name": gsr.name, "gid": gsr.gid, "rooms": [], "error": str(e)}
+
+        with ThreadPoolExecutor(max_workers=min(AVAILABILITY_MAX_WORKERS, len(gsrs))) as executor:
+            return list(executor.map(fetch, gsrs))
+
     def get_reservations(self, user, group=None):
         q = Q(user=user) | Q(reservation__creator=user) if group else Q(user=user)
         bookings = GSRBooking.objects.filter(
@@ -3,6 +3,7 @@ from django.views.decorators.cache import cache_page
 from rest_framework import routers
 
 from gsr_booking.views import (
+    AllAvailability,
     Availability,
     BookRoom,
     CancelRoom,
@@ -28,6 +29,7 @@ urlpatterns = [
     path("locations/", cache_page(Cache.MONTH)(Locations.as_view()), name="locations"),
     path("recent/", RecentGSRs.as_view(), name="recent-gsrs"),
     path("wharton/", CheckWharton.as_view(), name="is-wharton"),
+    path("availability/", AllAvailability.as_view(), name="all-availability"),
     path("availability/<lid>/<gid>", Availability.as_view(), name="availability"),
     path("book/", BookRoom.as_view(), name="book"),
     path("cancel/", CancelRoom.as_view(), name="cancel"),
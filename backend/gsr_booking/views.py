@@ -195,6 +195,33 @@ class Availability(APIView):
             return Response({"error": str(e)}, status=400)
 
 
+class AllAvailability(APIView):
+    """
+    Returns JSON containing all rooms for every building, fetched in one round trip.
+    Usage:
+        /studyspaces/availability/ gives all rooms for the next 24 hours
+        /studyspaces/availability/?start=2018-25-01 gives all rooms in the start date
+        /studyspaces/availability/?start=...&end=... gives all rooms between the two days
+    Buildings that could not be fetched have an "error" field and no rooms.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+
+        start = request.GET.get("start")
+        end = request.GET.get("end")
+
+        return Response(
+            GSRBooker.get_all_availability(
+                start,
+                end,
+                request.user,
+                request.user.booking_groups.filter(name="Penn Labs").first(),
+            )
+        )
+
+
 class BookRoom(APIView):
     """Books room in any GSR in the availability route"""
 
@@ -1,7 +1,8 @@
 from django.contrib import admin
 
-from laundry.models import LaundryRoom, LaundrySnapshot
+from laundry.models import LaundryHourlyUsage, LaundryRoom, LaundrySnapshot
 
 
 admin.site.register(LaundrySnapshot)
+admin.site.register(LaundryHourlyUsage)
 admin.site.register(LaundryRoom)
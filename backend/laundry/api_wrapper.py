@@ -1,24 +1,45 @@
-import requests
+import datetime
+from concurrent.futures import ThreadPoolExecutor, wait
+
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
-from requests.exceptions import HTTPError
+from requests.exceptions import HTTPError, RequestException
+
+from laundry.models import LaundryHourlyUsage, LaundryRoom, LaundrySnapshot
+from utils import http
+from utils.cache import Cache
+
+
+# rooms are polled concurrently by all_status, with a time budget per room and per run
+STATUS_MAX_WORKERS = 10
+ROOM_TIMEOUT = 10
+ALL_STATUS_TIMEOUT = 60
+# refresh_status runs every minute, keep it well under that so runs never overlap
+REFRESH_STATUS_TIMEOUT = 30
 
-from laundry.models import LaundryRoom, LaundrySnapshot
+# refresh_laundry_status runs every minute, entries survive a few failed runs
+STATUS_CACHE_KEY = "laundry_status:{room_id}"
+STATUS_CACHE_TIMEOUT = 5 * Cache.MINUTE
+
+# get_snapshot runs every 15 minutes, snapshots are keyed by the start of the interval
+SNAPSHOT_INTERVAL = 15
 
 
 def get_room_url(room_id: int):
     return f"{settings.LAUNDRY_URL}/rooms/{room_id}/machines?raw=true"
 
 
-def get_validated(url):
+def get_validated(url, timeout=60):
     """
     Makes a request to the given URL and returns the JSON response if the request is successful.
     Uses headers specific to the laundry API and should not be used for other requests.
     @param url: The URL to make the request to.
+    @param timeout: Seconds to wait for the laundry API.
     @return: The JSON response if the request is successful, otherwise None.
     """
     try:
-        request = requests.get(url, timeout=60, headers=settings.LAUNDRY_HEADERS)
+        request = http.get(url, timeout=timeout, headers=settings.LAUNDRY_HEADERS)
         request.raise_for_status()
         return request.json()
     except HTTPError as e:
@@ -58,19 +79,32 @@ def update_machine_object(machine, machine_type_data):
     return machine_type_data
 
 
-def parse_a_room(room_request_link):
+def parse_a_room(room_request_link, timeout=60):
     """
     Return names, hall numbers, and the washers/dryers available for a certain room_id
     """
 
+    return parse_machines(get_validated(room_request_link, timeout=timeout) or [])
+
+
+def poll_room(room_id, timeout=ROOM_TIMEOUT):
+    """
+    Like parse_a_room, but returns None when the laundry API returns an error, instead of
+    a room with no machines
+    """
+
+    request_json = get_validated(get_room_url(room_id), timeout=timeout)
+    return None if request_json is None else parse_machines(request_json)
+
+
+def parse_machines(request_json):
+    """
+    Return the washers/dryers available, given the laundry API's machines for a room
+    """
+
     washers = {"open": 0, "running": 0, "out_of_order": 0, "offline": 0, "time_remaining": []}
     dryers = {"open": 0, "running": 0, "out_of_order": 0, "offline": 0, "time_remaining": []}
 
-    detailed = []
-
-    request_json = get_validated(room_request_link)
-    if request_json is None:
-        return {"washers": washers, "dryers": dryers, "details": detailed}
     for machine in request_json:
         if machine["isWasher"]:
             update_machine_object(machine, washers)
@@ -103,14 +137,68 @@ def check_is_working():
     return all_rooms_request is not None
 
 
+def poll_rooms(rooms, timeout=ALL_STATUS_TIMEOUT):
+    """
+    Return the washers/dryers available for each of the given rooms, keyed by room_id
+
+    Rooms are polled concurrently. Rooms that fail or don't respond within the time budget
+    are left out, so one slow room can't hold up the others.
+    """
+
+    if len(rooms) == 0:
+        return {}
+
+    executor = ThreadPoolExecutor(max_workers=min(STATUS_MAX_WORKERS, len(rooms)))
+    futures = {executor.submit(poll_room, room.room_id): room for room in rooms}
+    done, not_done = wait(futures, timeout=timeout)
+    # don't wait on stragglers, their requests time out on their own
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    data = {}
+    for future in done:
+        room = futures[future]
+        try:
+            machines = future.result()
+        except (RequestException, KeyError, ValueError) as e:
+            print(f"Error: {room.name}: {e}")
+            continue
+        if machines is None:
+            print(f"Error: {room.name}: laundry API error")
+        else:
+            data[room.room_id] = machines
+    for future in not_done:
+        print(f"Error: {futures[future].name}: timed out")
+
+    # keep the room order stable for callers
+    return {room.room_id: data[room.room_id] for room in rooms if room.room_id in data}
+
+
 def all_status():
     """
     Return names, hall numbers, and the washers/dryers available for all rooms in the system
     """
 
-    return {
-        room.name: parse_a_room(get_room_url(room.room_id)) for room in LaundryRoom.objects.all()
-    }
+    rooms = list(LaundryRoom.objects.all())
+    data = poll_rooms(rooms)
+    return {room.name: data[room.room_id] for room in rooms if room.room_id in data}
+
+
+def refresh_status():
+    """
+    Polls every room and caches its machines, so requests never wait on the laundry API.
+    Rooms that fail keep their previous entry until it expires.
+    """
+
+    now = timezone.localtime()
+    data = poll_rooms(list(LaundryRoom.objects.all()), REFRESH_STATUS_TIMEOUT)
+    cache.set_many(
+        {
+            STATUS_CACHE_KEY.format(room_id=room_id): {"machines": machines, "last_updated": now}
+            for room_id, machines in data.items()
+        },
+        STATUS_CACHE_TIMEOUT,
+    )
+    return len(data)
 
 
 def room_status(room):
@@ -118,27 +206,98 @@ def room_status(room):
     Return the status of each specific washer/dryer in a particular hall_id
     """
 
-    machines = parse_a_room(get_room_url(room.room_id))
+    return rooms_status([room])[0]
+
+
+def rooms_status(rooms):
+    """
+    Return the status of each room, in the same order
+
+    Statuses come from the cache filled by refresh_status. Rooms missing from the cache are
+    fetched from the laundry API concurrently.
+    """
+
+    if len(rooms) == 0:
+        return []
+
+    keys = {room.room_id: STATUS_CACHE_KEY.format(room_id=room.room_id) for room in rooms}
+    cached = cache.get_many(keys.values())
+    statuses = {room_id: cached[key] for room_id, key in keys.items() if key in cached}
+
+    if missing := list({room.room_id for room in rooms if room.room_id not in statuses}):
+        now = timezone.localtime()
+
+        with ThreadPoolExecutor(max_workers=min(STATUS_MAX_WORKERS, len(missing))) as executor:
+            fetched = dict(zip(missing, executor.map(poll_room, missing)))
+        # later requests are served from the cache until refresh_status catches up
+        cache.set_many(
+            {
+                keys[room_id]: {"machines": machines, "last_updated": now}
+                for room_id, machines in fetched.items()
+                if machines is not None
+            },
+            STATUS_CACHE_TIMEOUT,
+        )
+        # rooms the laundry API failed on have no machines, and no time they were seen at
+        statuses.update(
+            {
+                room_id: (
+                    {"machines": machines, "last_updated": now}
+                    if machines is not None
+                    else {"machines": parse_machines([]), "last_updated": None}
+                )
+                for room_id, machines in fetched.items()
+            }
+        )
+
+    return [
+        {
+            "machines": statuses[room.room_id]["machines"],
+            "hall_name": room.name,
+            "location": room.location,
+            "last_updated": statuses[room.room_id]["last_updated"],
+        }
+        for room in rooms
+    ]
+
 
-    return {"machines": machines, "hall_name": room.name, "location": room.location}
+def get_snapshot_date(now=None):
+    """
+    Returns the start of the snapshot interval containing now, which is the snapshot's date
+    """
+
+    now = now or timezone.localtime()
+    return now.replace(minute=now.minute - now.minute % SNAPSHOT_INTERVAL, second=0, microsecond=0)
 
 
 def save_data():
     """
     Retrieves current laundry info and saves it into the database.
-    """
 
-    now = timezone.localtime()
+    Running this more than once in an interval only polls the rooms that don't have a
+    snapshot for the interval yet, and never creates duplicates.
+    """
 
-    if LaundrySnapshot.objects.filter(date=now).count() == 0:
-        data = all_status()
+    date = get_snapshot_date()
 
-        for name, room in data.items():
-            laundry_room = LaundryRoom.objects.get(name=name)
+    saved = set(LaundrySnapshot.objects.filter(date=date).values_list("room_id", flat=True))
+    rooms = [room for room in LaundryRoom.objects.all() if room.id not in saved]
+    data = poll_rooms(rooms)
 
-            LaundrySnapshot.objects.create(
-                room=laundry_room,
-                date=now,
-                available_washers=room["washers"]["open"],
-                available_dryers=room["dryers"]["open"],
+    LaundrySnapshot.objects.bulk_create(
+        [
+            LaundrySnapshot(
+                room=room,
+                date=date,
+                available_washers=data[room.room_id]["washers"]["open"],
+                available_dryers=data[room.room_id]["dryers"]["open"],
             )
+            for room in rooms
+            if room.room_id in data
+        ],
+        ignore_conflicts=True,
+    )
+
+    # bulk_create skips post_save, so update the hourly usage rollup here
+    hour = date.replace(minute=0)
+    LaundryHourlyUsage.rollup(hour, hour + datetime.timedelta(hours=1), rooms)
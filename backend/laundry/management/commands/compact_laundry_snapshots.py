@@ -0,0 +1,24 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from laundry.models import LaundrySnapshot
+
+
+class Command(BaseCommand):
+    help = "Folds old Laundry Snapshots into the hourly usage rollup and deletes them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.LAUNDRY_SNAPSHOT_RETENTION_DAYS,
+            help="Number of days of raw snapshots to keep.",
+        )
+
+    def handle(self, *args, **kwargs):
+        before = timezone.localtime() - datetime.timedelta(days=kwargs["days"])
+        deleted = LaundrySnapshot.compact(before)
+        self.stdout.write(f"Compacted {deleted} laundry snapshots!")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from laundry.api_wrapper import refresh_status
+
+
+class Command(BaseCommand):
+    help = "Caches the current machine status of every Laundry room."
+
+    def handle(self, *args, **kwargs):
+        count = refresh_status()
+        self.stdout.write(f"Refreshed status for {count} laundry rooms!")
@@ -0,0 +1,32 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from laundry.models import LaundryHourlyUsage
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the hourly laundry usage rollup from raw Laundry Snapshots."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=35,
+            help="Number of days back to rebuild. Usage only reads the last 4 weeks.",
+        )
+
+    def handle(self, *args, **kwargs):
+        end = timezone.localtime()
+        start = (end - datetime.timedelta(days=kwargs["days"])).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+
+        # one day at a time to keep each aggregate query small
+        day = start
+        while day < end:
+            LaundryHourlyUsage.rollup(day, day + datetime.timedelta(days=1))
+            day += datetime.timedelta(days=1)
+
+        self.stdout.write("Rebuilt laundry usage!")
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.2 on 2026-10-17 03:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("laundry", "0004_alter_laundryroom_room_id"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="laundrysnapshot",
+            constraint=models.UniqueConstraint(
+                fields=("room", "date"), name="unique_room_snapshot_date"
+            ),
+        ),
+    ]
@@ -1,4 +1,11 @@
-from django.db import models
+import datetime
+from collections import defaultdict
+
+from django.db import models, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncHour
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.utils import timezone
 
 
@@ -20,5 +27,114 @@ class LaundrySnapshot(models.Model):
     available_washers = models.IntegerField()
     available_dryers = models.IntegerField()
 
+    class Meta:
+        # snapshots are taken once per interval, see laundry.api_wrapper.save_data
+        constraints = [
+            models.UniqueConstraint(fields=["room", "date"], name="unique_room_snapshot_date")
+        ]
+
     def __str__(self):
         return f"Room {self.room.name} | {self.date.date()}"
+
+    @classmethod
+    def compact(cls, before):
+        """
+        Folds every snapshot older than `before` into LaundryHourlyUsage and deletes it.
+        `before` is rounded down to the hour, so an hour is never left half rolled up.
+        Returns the number of snapshots deleted.
+        """
+
+        before = timezone.localtime(before).replace(minute=0, second=0, microsecond=0)
+        if (oldest := cls.objects.filter(date__lt=before).order_by("date").first()) is None:
+            return 0
+
+        # one day at a time to keep each aggregate query and delete small
+        deleted = 0
+        day = timezone.localtime(oldest.date).replace(minute=0, second=0, microsecond=0)
+        while day < before:
+            end = min(day + datetime.timedelta(days=1), before)
+            with transaction.atomic():
+                LaundryHourlyUsage.rollup(day, end)
+                deleted += cls.objects.filter(date__gte=day, date__lt=end).delete()[0]
+            day = end
+        return deleted
+
+
+class LaundryHourlyUsage(models.Model):
+    """
+    Per room, per local hour totals of LaundrySnapshots, so usage can be computed
+    without scanning raw snapshots
+    """
+
+    room = models.ForeignKey(LaundryRoom, on_delete=models.CASCADE)
+    date = models.DateField()
+    hour = models.IntegerField()
+    sum_washers = models.IntegerField(default=0)
+    sum_dryers = models.IntegerField(default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["room", "date", "hour"], name="unique_room_usage_hour")
+        ]
+
+    def __str__(self):
+        return f"Room {self.room.name} | {self.date} {self.hour}:00"
+
+    @classmethod
+    def rollup(cls, start, end, rooms=None):
+        """
+        Recomputes the rows for every hour between start and end from the raw snapshots.
+        Safe to run repeatedly over the same range.
+        """
+
+        start = timezone.localtime(start).replace(minute=0, second=0, microsecond=0)
+        snapshots = LaundrySnapshot.objects.filter(date__gte=start, date__lt=end)
+        if rooms is not None:
+            snapshots = snapshots.filter(room__in=rooms)
+
+        totals = defaultdict(lambda: [0, 0, 0])
+        for row in (
+            snapshots.annotate(local_hour=TruncHour("date"))
+            .values("room_id", "local_hour")
+            .annotate(
+                sum_washers=Sum("available_washers"),
+                sum_dryers=Sum("available_dryers"),
+                count=Count("id"),
+            )
+        ):
+            # the hour repeated when DST ends truncates to two different datetimes
+            local_hour = timezone.localtime(row["local_hour"])
+            total = totals[(row["room_id"], local_hour.date(), local_hour.hour)]
+            total[0] += row["sum_washers"]
+            total[1] += row["sum_dryers"]
+            total[2] += row["count"]
+
+        cls.objects.bulk_create(
+            [
+                cls(
+                    room_id=room_id,
+                    date=date,
+                    hour=hour,
+                    sum_washers=sum_washers,
+                    sum_dryers=sum_dryers,
+                    count=count,
+                )
+                for (room_id, date, hour), (sum_washers, sum_dryers, count) in totals.items()
+            ],
+            update_conflicts=True,
+            update_fields=["sum_washers", "sum_dryers", "count"],
+            unique_fields=["room", "date", "hour"],
+        )
+
+
+@receiver(post_save, sender=LaundrySnapshot)
+def rollup_laundry_snapshot(sender, instance, **kwargs):
+    """
+    Keeps LaundryHourlyUsage up to date with snapshots saved one at a time.
+    Bulk inserts (laundry.api_wrapper.save_data) call LaundryHourlyUsage.rollup directly.
+    """
+    if instance.room_id is None:
+        return
+    start = timezone.localtime(instance.date).replace(minute=0, second=0, microsecond=0)
+    LaundryHourlyUsage.rollup(start, start + datetime.timedelta(hours=1), [instance.room_id])
@@ -3,6 +3,7 @@ import datetime
 
 from django.core.cache import cache
 from django.db.models import Q
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from requests.exceptions import HTTPError
@@ -10,8 +11,8 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from laundry.api_wrapper import check_is_working, room_status
-from laundry.models import LaundryRoom, LaundrySnapshot
+from laundry.api_wrapper import check_is_working, room_status, rooms_status
+from laundry.models import LaundryHourlyUsage, LaundryRoom
 from laundry.serializers import LaundryRoomSerializer
 from pennmobile.analytics import Metric, record_analytics
 from utils.cache import Cache
@@ -44,13 +45,20 @@ class MultipleHallInfo(APIView):
     """
 
     def get(self, request, room_ids):
-        rooms = [int(x) for x in room_ids.split(",")]
+        room_ids = [int(x) for x in room_ids.split(",")]
+        rooms_by_id = {
+            room.room_id: room for room in LaundryRoom.objects.filter(room_id__in=room_ids)
+        }
+        if len(rooms_by_id) != len(set(room_ids)):
+            raise Http404("No LaundryRoom matches the given query.")
+
+        rooms = [rooms_by_id[room_id] for room_id in room_ids]
+        usages = HallUsage.compute_usages(rooms)
         output = {"rooms": []}
 
-        for room_id in rooms:
-            room_data = room_status(get_object_or_404(LaundryRoom, room_id=room_id))
-            room_data["id"] = room_id
-            room_data["usage_data"] = HallUsage.compute_usage(room_id)
+        for room, room_data in zip(rooms, rooms_status(rooms)):
+            room_data["id"] = room.room_id
+            room_data["usage_data"] = usages[room.id]
             output["rooms"].append(room_data)
 
         record_analytics(Metric.LAUNDRY_VIEWED, request.user.username)
@@ -66,74 +74,76 @@ class HallUsage(APIView):
     def safe_division(a, b):
         return round(a / float(b), 3) if b > 0 else 0
 
-    def get_snapshot_info(room_id):
-        # filters for LaundrySnapshots within timeframe
-        room = get_object_or_404(LaundryRoom, room_id=room_id)
-
-        # get start time, which is now without the times
-        start = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    def get_usage_info(rooms):
+        # the same weekday within the previous 28 days, plus 3 hours of the following day
+        today = timezone.localtime().date()
+        days = [today - datetime.timedelta(weeks=week) for week in range(4)]
+        next_days = [day + datetime.timedelta(days=1) for day in days]
 
-        # adds all the LaundrySnapshots from the same weekday within the previous 28 days
-        filter = Q()
-        for week in range(4):
-            new_start = start - datetime.timedelta(weeks=week)
-            new_end = new_start + datetime.timedelta(hours=27)
-            filter |= Q(room=room, date__gt=new_start, date__lt=new_end)
-
-        snapshots = LaundrySnapshot.objects.filter(filter).order_by("-date")
-        return (room, snapshots)
+        usages = LaundryHourlyUsage.objects.filter(
+            Q(date__in=days) | Q(date__in=next_days, hour__lt=3), room__in=rooms
+        )
+        return (usages, set(next_days))
 
     def compute_usage(room_id):
         try:
-            (room, snapshots) = HallUsage.get_snapshot_info(room_id)
+            room = get_object_or_404(LaundryRoom, room_id=room_id)
         except ValueError:
             return Response({"error": "Invalid hall id passed to server."}, status=404)
 
+        return HallUsage.compute_usages([room])[room.id]
+
+    def compute_usages(rooms):
+        """
+        Computes usage for several rooms with a single query, keyed by LaundryRoom id
+        """
+
+        (usages, next_days) = HallUsage.get_usage_info(rooms)
+
         # [0]: available washers, [1]: available dryers, [2]: total number of LaundrySnapshots
-        data = [(0, 0, 0)] * 27
+        data = {room.id: [(0, 0, 0)] * 27 for room in rooms}
 
         # used calculate the start and end dates
-        min_date = timezone.localtime()
-        max_date = timezone.localtime() - datetime.timedelta(days=30)
+        min_dates = {room.id: timezone.localtime().date() for room in rooms}
+        max_dates = {
+            room.id: (timezone.localtime() - datetime.timedelta(days=30)).date() for room in rooms
+        }
 
-        for snapshot in snapshots:
-            date = snapshot.date.astimezone()
-            min_date = min(min_date, date)
-            max_date = max(max_date, date)
-            hour = date.hour
+        for usage in usages:
+            min_dates[usage.room_id] = min(min_dates[usage.room_id], usage.date)
+            max_dates[usage.room_id] = max(max_dates[usage.room_id], usage.date)
 
             # accounts for the 3 hours on the next day
-            if (
-                calendar.day_name[timezone.localtime().weekday()]
-                == calendar.day_name[(date - datetime.timedelta(days=1)).weekday()]
-            ):
-                hour = date.hour + 24
+            hour = usage.hour + 24 if usage.date in next_days else usage.hour
 
             # adds total number of available washers and dryers
-            if hour < len(data):
-                data[hour] = (
-                    data[hour][0] + snapshot.available_washers,
-                    data[hour][1] + snapshot.available_dryers,
-                    data[hour][2] + 1,
-                )
-
-        content = {
-            "hall_name": room.name,
-            "location": room.location,
-            "day_of_week": calendar.day_name[timezone.localtime().weekday()],
-            "start_date": min_date.date(),
-            "end_date": max_date.date(),
-            "washer_data": {
-                x: HallUsage.safe_division(data[x][0], data[x][2]) for x in range(len(data))
-            },
-            "dryer_data": {
-                x: HallUsage.safe_division(data[x][1], data[x][2]) for x in range(len(data))
-            },
-            "total_number_of_washers": room.total_washers,
-            "total_number_of_dryers": room.total_dryers,
-        }
+            room_data = data[usage.room_id]
+            room_data[hour] = (
+                room_data[hour][0] + usage.sum_washers,
+                room_data[hour][1] + usage.sum_dryers,
+                room_data[hour][2] + usage.count,
+            )
 
-        return content
+        return {
+            room.id: {
+                "hall_name": room.name,
+                "location": room.location,
+                "day_of_week": calendar.day_name[timezone.localtime().weekday()],
+                "start_date": min_dates[room.id],
+                "end_date": max_dates[room.id],
+                "washer_data": {
+                    x: HallUsage.safe_division(data[room.id][x][0], data[room.id][x][2])
+                    for x in range(27)
+                },
+                "dryer_data": {
+                    x: HallUsage.safe_division(data[room.id][x][1], data[room.id][x][2])
+                    for x in range(27)
+                },
+                "total_number_of_washers": room.total_washers,
+                "total_number_of_dryers": room.total_dryers,
+            }
+            for room in rooms
+        }
 
     def get(self, request, room_id):
         return Response(HallUsage.compute_usage(room_id))
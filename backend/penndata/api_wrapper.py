@@ -0,0 +1,144 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from bs4 import BeautifulSoup, SoupStrainer
+from django.core.cache import cache
+from requests.exceptions import RequestException
+
+from utils import http
+from utils.cache import Cache
+
+
+APP_VERSION_URL = "http://itunes.apple.com/lookup?bundleId=org.pennlabs.PennMobile"
+DP_URL = "https://www.thedp.com/"
+DP_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_11_5) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/50.0.2661.102 Safari/537.36"
+}
+FRONTPAGE = "col-lg-6 col-md-5 col-sm-12 frontpage-carousel"
+
+APP_VERSION_CACHE_KEY = "penndata:app_version"
+ARTICLE_CACHE_KEY = "penndata:dp_article"
+# ETag and Last-Modified of the page the cached article was parsed from
+ARTICLE_VALIDATORS_CACHE_KEY = "penndata:dp_article:validators"
+# refreshed every 15 minutes by refresh_homepage, this only matters if the job stops running
+HOMEPAGE_CACHE_TIMEOUT = Cache.HOUR
+# (connect, read) seconds for fetches on the request path, so a slow upstream can't hold it
+LIVE_TIMEOUT = (2, 3)
+
+
+def fetch_app_version(timeout=None):
+    """Returns the latest Penn Mobile version on the App Store, or None if it can't be read"""
+    try:
+        return http.get(APP_VERSION_URL, timeout=timeout).json()["results"][0]["version"]
+    except (RequestException, KeyError, IndexError, ValueError):
+        return None
+
+
+def fetch_article(timeout=None):
+    """
+    Scrapes the front page article of the DP, or returns None if it can't be parsed.
+    While an article is cached, the request is conditional and a 304 returns it as is.
+    """
+    cached = cache.get(ARTICLE_CACHE_KEY)
+    headers = dict(DP_HEADERS)
+    if cached is not None and (validators := cache.get(ARTICLE_VALIDATORS_CACHE_KEY)):
+        if etag := validators.get("etag"):
+            headers["If-None-Match"] = etag
+        if last_modified := validators.get("last_modified"):
+            headers["If-Modified-Since"] = last_modified
+
+    try:
+        resp = http.get(DP_URL, headers=headers, timeout=timeout)
+    except RequestException:
+        return None
+
+    if resp.status_code == 304:
+        cache.touch(ARTICLE_VALIDATORS_CACHE_KEY, HOMEPAGE_CACHE_TIMEOUT)
+        return cached
+
+    if (article := parse_article(resp.content)) is not None:
+        cache.set(
+            ARTICLE_VALIDATORS_CACHE_KEY,
+            {"etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified")},
+            HOMEPAGE_CACHE_TIMEOUT,
+        )
+    return article
+
+
+def parse_article(content):
+    article = {"source": "The Daily Pennsylvanian"}
+
+    # only the front page carousel is parsed, the rest of the page is skipped
+    soup = BeautifulSoup(
+        content.decode("utf8"), "html.parser", parse_only=SoupStrainer("div", class_=FRONTPAGE)
+    )
+
+    if not (frontpage := soup.find("div", {"class": FRONTPAGE})):
+        return None
+
+    # adds all variables for news object
+    if not (title_html := frontpage.find("a", {"class": "frontpage-link large-link"})):
+        return None
+    article["link"] = title_html["href"]
+    article["title"] = title_html.get_text()
+
+    subtitle_html = frontpage.find("p")
+    if subtitle_html:
+        article["subtitle"] = subtitle_html.get_text()
+
+    timestamp_html = frontpage.find("div", {"class": "timestamp"})
+    if timestamp_html:
+        article["timestamp"] = timestamp_html.get_text().strip()
+
+    image_html = frontpage.find("img")
+    if image_html:
+        article["imageurl"] = image_html["src"]
+
+    # checks if all variables are there
+    if all(v in article for v in ["title", "subtitle", "timestamp", "imageurl", "link"]):
+        return article
+    else:
+        return None
+
+
+def get_fetchers():
+    return {APP_VERSION_CACHE_KEY: fetch_app_version, ARTICLE_CACHE_KEY: fetch_article}
+
+
+def refresh_homepage():
+    """
+    Fetches the app version and DP article and caches them for the home page.
+    A value that can't be fetched keeps its previously cached value.
+    """
+    values = {key: fetch() for key, fetch in get_fetchers().items()}
+    values = {key: value for key, value in values.items() if value is not None}
+    cache.set_many(values, HOMEPAGE_CACHE_TIMEOUT)
+    return values
+
+
+def get_cached(*keys):
+    """
+    Returns the cached values of `keys`. Anything missing is fetched live, concurrently and
+    with a short timeout, and cached for the next request.
+    """
+    fetchers = get_fetchers()
+    data = cache.get_many(keys)
+    if missing := [key for key in keys if key not in data]:
+        with ThreadPoolExecutor(max_workers=len(missing)) as executor:
+            futures = {key: executor.submit(fetchers[key], LIVE_TIMEOUT) for key in missing}
+        fetched = {key: future.result() for key, future in futures.items()}
+        cache.set_many(
+            {key: value for key, value in fetched.items() if value is not None},
+            HOMEPAGE_CACHE_TIMEOUT,
+        )
+        data.update(fetched)
+    return [data.get(key) for key in keys]
+
+
+def get_homepage_data():
+    """Returns (app version, DP article)"""
+    return get_cached(APP_VERSION_CACHE_KEY, ARTICLE_CACHE_KEY)
+
+
+def get_article():
+    return get_cached(ARTICLE_CACHE_KEY)[0]
@@ -0,0 +1,24 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from penndata.models import FitnessSnapshot
+
+
+class Command(BaseCommand):
+    help = "Downsamples old Fitness Snapshots to at most one per room per hour."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.FITNESS_SNAPSHOT_RETENTION_DAYS,
+            help="Number of days of raw snapshots to keep.",
+        )
+
+    def handle(self, *args, **kwargs):
+        before = timezone.localtime() - datetime.timedelta(days=kwargs["days"])
+        removed = FitnessSnapshot.compact(before)
+        self.stdout.write(f"Compacted {removed} fitness snapshots!")
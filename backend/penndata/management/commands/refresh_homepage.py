@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from penndata.api_wrapper import refresh_homepage
+
+
+class Command(BaseCommand):
+    help = "Caches the latest app version and DP article for the home page."
+
+    def handle(self, *args, **kwargs):
+        refreshed = refresh_homepage()
+        self.stdout.write(f"Refreshed {len(refreshed)} home page values!")
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.2 on 2026-10-17 03:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("penndata", "0012_alter_event_event_type"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="fitnesssnapshot",
+            index=models.Index(fields=["room", "date"], name="penndata_fi_room_id_ef56cc_idx"),
+        ),
+    ]
@@ -1,5 +1,9 @@
+import datetime
+
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Avg, Count, Min
+from django.db.models.functions import TruncHour
 from django.utils import timezone
 
 from portal.models import Poll, Post
@@ -86,9 +90,58 @@ class FitnessSnapshot(models.Model):
     count = models.IntegerField()
     capacity = models.FloatField(null=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["room", "date"])]
+
     def __str__(self):
         return f"Room Name: {self.room.name} | {self.date.date()}"
 
+    @classmethod
+    def compact(cls, before):
+        """
+        Downsamples snapshots older than `before` to at most one per room per hour, averaging
+        count and capacity. FitnessUsage interpolates between snapshots, so it reads compacted
+        hours the same way. Returns the number of snapshots removed.
+        """
+
+        before = timezone.localtime(before).replace(minute=0, second=0, microsecond=0)
+        hours = list(
+            cls.objects.filter(date__lt=before)
+            # group by UTC hours, the local hour repeated when DST ends spans two of them
+            .annotate(hour=TruncHour("date", tzinfo=datetime.timezone.utc))
+            .values("room_id", "hour")
+            .annotate(
+                num=Count("id"),
+                first=Min("date"),
+                avg_count=Avg("count"),
+                avg_capacity=Avg("capacity"),
+            )
+            .filter(num__gt=1)
+        )
+
+        removed = 0
+        with transaction.atomic():
+            for row in hours:
+                start = row["hour"]
+                cls.objects.filter(
+                    room_id=row["room_id"],
+                    date__gte=start,
+                    date__lt=start + datetime.timedelta(hours=1),
+                ).delete()
+                removed += row["num"] - 1
+            cls.objects.bulk_create(
+                [
+                    cls(
+                        room_id=row["room_id"],
+                        date=row["first"],
+                        count=round(row["avg_count"]),
+                        capacity=row["avg_capacity"],
+                    )
+                    for row in hours
+                ]
+            )
+        return removed
+
 
 class AnalyticsEvent(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
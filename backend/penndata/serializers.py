@@ -44,6 +44,22 @@ class FitnessRoomSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class FitnessRoomUsageSerializer(FitnessRoomSerializer):
+    """A room with its latest snapshot, annotated by FitnessRoomView, and its schedule"""
+
+    last_updated = serializers.DateTimeField(read_only=True)
+    count = serializers.IntegerField(read_only=True)
+    capacity = serializers.FloatField(read_only=True)
+    open = serializers.SerializerMethodField()
+    close = serializers.SerializerMethodField()
+
+    def get_open(self, obj):
+        return self.context["open"]
+
+    def get_close(self, obj):
+        return self.context["close"]
+
+
 class FitnessSnapshotSerializer(serializers.ModelSerializer):
 
     room = FitnessRoomSerializer()
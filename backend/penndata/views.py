@@ -1,17 +1,17 @@
+import bisect
 import datetime
 from datetime import timedelta
 
-import requests
-from bs4 import BeautifulSoup
+from django.db.models import OuterRef, Subquery
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from requests.exceptions import ConnectionError
 from rest_framework import generics
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from laundry.models import LaundryRoom
+from penndata.api_wrapper import get_article, get_homepage_data
 from penndata.models import (
     AnalyticsEvent,
     CalendarEvent,
@@ -24,64 +24,18 @@ from penndata.serializers import (
     AnalyticsEventSerializer,
     CalendarEventSerializer,
     EventSerializer,
-    FitnessRoomSerializer,
+    FitnessRoomUsageSerializer,
     HomePageOrderSerializer,
 )
 
 
 class News(APIView):
     """
-    GET: Get's news article from the DP
+    GET: Get's news article from the DP, as cached by the refresh_homepage job
     """
 
-    def get_article(self):
-        article = {"source": "The Daily Pennsylvanian"}
-        try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_11_5) AppleWebKit/537.36 "
-                "(KHTML, like Gecko) Chrome/50.0.2661.102 Safari/537.36"
-            }
-            resp = requests.get("https://www.thedp.com/", headers=headers)
-        except ConnectionError:
-            return None
-
-        html = resp.content.decode("utf8")
-
-        soup = BeautifulSoup(html, "html5lib")
-
-        if not (
-            frontpage := soup.find(
-                "div", {"class": "col-lg-6 col-md-5 col-sm-12 frontpage-carousel"}
-            )
-        ):
-            return None
-
-        # adds all variables for news object
-        if not (title_html := frontpage.find("a", {"class": "frontpage-link large-link"})):
-            return None
-        article["link"] = title_html["href"]
-        article["title"] = title_html.get_text()
-
-        subtitle_html = frontpage.find("p")
-        if subtitle_html:
-            article["subtitle"] = subtitle_html.get_text()
-
-        timestamp_html = frontpage.find("div", {"class": "timestamp"})
-        if timestamp_html:
-            article["timestamp"] = timestamp_html.get_text().strip()
-
-        image_html = frontpage.find("img")
-        if image_html:
-            article["imageurl"] = image_html["src"]
-
-        # checks if all variables are there
-        if all(v in article for v in ["title", "subtitle", "timestamp", "imageurl", "link"]):
-            return article
-        else:
-            return None
-
     def get(self, request):
-        article = self.get_article()
+        article = get_article()
         if article:
             return Response(article)
         else:
@@ -197,19 +151,19 @@ class HomePage(APIView):
         else:
             cells.append(self.Cell("dining", {"venues": default_ids}, 100))
 
+        # app version and DP article are cached by the refresh_homepage job
+        actual_version, article = get_homepage_data()
+
         # gives an update banner if Penn Mobile needs an update
         current_version = request.GET.get("version")
-        actual_version = requests.get(
-            url="http://itunes.apple.com/lookup?bundleId=org.pennlabs.PennMobile"
-        ).json()["results"][0]["version"]
-        if current_version and current_version < actual_version:
+        if current_version and actual_version and current_version < actual_version:
             cells.append(self.Cell("new-version-released", None, 10000))
 
         # adds events up to 2 weeks
         # cells.append(self.Cell("calendar", {"calendar": Calendar.get_calendar(self)}, 40))
 
         # adds front page article of DP
-        cells.append(self.Cell("news", {"article": News.get_article(self)}, 50))
+        cells.append(self.Cell("news", {"article": article}, 50))
 
         # sorts by cell weight
         cells.sort(key=lambda x: x.weight, reverse=True)
@@ -222,8 +176,7 @@ class FitnessRoomView(generics.ListAPIView):
     GET: Get Fitness Usage
     """
 
-    queryset = FitnessRoom.objects.all()
-    serializer_class = FitnessRoomSerializer
+    serializer_class = FitnessRoomUsageSerializer
 
     open_times = {
         0: (6, 23.5),
@@ -234,25 +187,27 @@ class FitnessRoomView(generics.ListAPIView):
         5: (8, 22),
         6: (9, 22),
     }
+    # the schedule is the same for every room
+    open = [
+        datetime.time(hour=int(hours), minute=int((hours % 1) * 60))
+        for hours, _ in open_times.values()
+    ]
+    close = [
+        datetime.time(hour=int(hours), minute=int((hours % 1) * 60))
+        for _, hours in open_times.values()
+    ]
 
-    def get(self, request):
-        response = super().get(self, request)
-        # also add last_updated and open/close times to each room in response
-        for room in response.data:
-            ss = FitnessSnapshot.objects.filter(room__id=room["id"]).order_by("-date").first()
-            room["last_updated"] = timezone.localtime(ss.date) if ss else None
-            room["count"] = getattr(ss, "count", None)
-            room["capacity"] = getattr(ss, "capacity", None)
-
-            room["open"] = [
-                datetime.time(hour=int(hours), minute=int((hours % 1) * 60))
-                for hours, _ in self.open_times.values()
-            ]
-            room["close"] = [
-                datetime.time(hour=int(hours), minute=int((hours % 1) * 60))
-                for _, hours in self.open_times.values()
-            ]
-        return response
+    def get_queryset(self):
+        # latest snapshot of each room, in the same query as the rooms
+        latest = FitnessSnapshot.objects.filter(room=OuterRef("pk")).order_by("-date")
+        return FitnessRoom.objects.annotate(
+            last_updated=Subquery(latest.values("date")[:1]),
+            count=Subquery(latest.values("count")[:1]),
+            capacity=Subquery(latest.values("capacity")[:1]),
+        )
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), "open": self.open, "close": self.close}
 
 
 class FitnessUsage(APIView):
@@ -267,9 +222,35 @@ class FitnessUsage(APIView):
             / (after_date - before_date).total_seconds()
         )
 
-    def get_usage_on_date(self, room, date, field):
+    def get_snapshots(self, room, dates, field):
         """
-        Returns the number of people in the fitness center on a given date per hour
+        Loads every snapshot for the given dates in one query. Returns a dict from local date
+        to (sorted snapshot dates, values) for that date
+        """
+
+        if not dates:
+            return {}
+        start = timezone.make_aware(datetime.datetime.combine(min(dates), datetime.time()))
+        end = timezone.make_aware(
+            datetime.datetime.combine(max(dates) + datetime.timedelta(days=1), datetime.time())
+        )
+        snapshots = {date: ([], []) for date in dates}
+        for snapshot_date, val in (
+            FitnessSnapshot.objects.filter(
+                room=room, date__gte=start, date__lt=end, date__date__in=dates
+            )
+            .order_by("date")
+            .values_list("date", field)
+        ):
+            snapshot_dates, vals = snapshots[timezone.localtime(snapshot_date).date()]
+            snapshot_dates.append(snapshot_date)
+            vals.append(val)
+        return snapshots
+
+    def get_usage_on_date(self, snapshots, date):
+        """
+        Returns the number of people in the fitness center on a given date per hour, given the
+        sorted (dates, values) of the snapshots taken on that date
         """
 
         # Rounded closing times down
@@ -278,8 +259,7 @@ class FitnessUsage(APIView):
         open, close = FitnessRoomView.open_times[date.weekday()]
         open, close = int(open), int(close)
 
-        # get all snapshots for a given room on a given date and the days before and after
-        snapshots = FitnessSnapshot.objects.filter(room=room, date__date=date)
+        snapshot_dates, vals = snapshots
 
         # For usage, None represents no data
         usage = [0] * 24
@@ -288,21 +268,25 @@ class FitnessUsage(APIView):
             hour_date = timezone.make_aware(datetime.datetime.combine(date, datetime.time(hour)))
 
             # use snapshots before and after the hour_date to interpolate
-            before = snapshots.filter(date__lte=hour_date).order_by("-date").first()
-            after = snapshots.filter(date__gte=hour_date).order_by("date").first()
+            before = bisect.bisect_right(snapshot_dates, hour_date) - 1
+            after = bisect.bisect_left(snapshot_dates, hour_date)
 
-            before_date, before_val = getattr(before, "date", None), getattr(before, field, None)
-            after_date, after_val = getattr(after, "date", None), getattr(after, field, None)
+            before_date, before_val = (
+                (snapshot_dates[before], vals[before]) if before >= 0 else (None, None)
+            )
+            after_date, after_val = (
+                (snapshot_dates[after], vals[after]) if after < len(vals) else (None, None)
+            )
 
             # This condition should only activate during morning times
-            if before is None:
+            if before_date is None:
                 before_date, before_val = (
                     timezone.make_aware(datetime.datetime.combine(date, datetime.time(open))),
                     0,
                 )
 
             # This can happen either on the current day or at last entries of other days
-            if after is None:
+            if after_date is None:
                 if date == timezone.localtime().date():
                     # Set value to None if the last retrieved data was
                     # over 2 hours old to avoid extrapolation
@@ -334,9 +318,11 @@ class FitnessUsage(APIView):
         min_date = timezone.localtime().date()
         max_date = date - datetime.timedelta(days=unit * (num_samples - 1))
 
-        for i in range(num_samples):
-            curr = date - datetime.timedelta(days=i * unit)
-            usage = self.get_usage_on_date(room, curr, field)  # usage for curr
+        dates = [date - datetime.timedelta(days=i * unit) for i in range(num_samples)]
+        snapshots = self.get_snapshots(room, dates, field)
+
+        for curr in dates:
+            usage = self.get_usage_on_date(snapshots[curr], curr)  # usage for curr
             # incorporate usage safely considering None (no data) values
             usage_aggs = [
                 (self.safe_add(sum, val), count + (1 if val is not None else 0))
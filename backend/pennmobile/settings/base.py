@@ -169,6 +169,11 @@ LAUNDRY_HEADERS = {
     "alliancels-auth-token": LAUNDRY_ALLIANCELS_API_KEY,
 }
 
+# Raw snapshots older than this many days are compacted, see compact_laundry_snapshots and
+# compact_fitness_snapshots
+LAUNDRY_SNAPSHOT_RETENTION_DAYS = int(os.environ.get("LAUNDRY_SNAPSHOT_RETENTION_DAYS", 60))
+FITNESS_SNAPSHOT_RETENTION_DAYS = int(os.environ.get("FITNESS_SNAPSHOT_RETENTION_DAYS", 365))
+
 # Dining API Credentials
 DINING_USERNAME = os.environ.get("DINING_USERNAME", None)
 DINING_PASSWORD = os.environ.get("DINING_PASSWORD", None)
@@ -1,15 +1,39 @@
+import itertools
 import json
+import operator
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import reduce
 
-from accounts.ipc import authenticated_request
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, Q
 from rest_framework.exceptions import PermissionDenied
 
-from portal.models import Poll, PollOption, PollVote, TargetPopulation
+from portal.models import DEMOGRAPHIC_BREAKDOWN_CACHE_KEY, PollOption, TargetPopulation
+from utils.cache import Cache
+from utils.http import authenticated_request, ensure_access_token
 
 
 User = get_user_model()
 
+USER_CLUBS_CACHE_KEY = "portal:user_clubs:{user_id}"
+USER_CLUBS_CACHE_TIMEOUT = 5 * Cache.MINUTE
+CLUB_INFO_MAX_WORKERS = 8
+
+# invalidated by portal.models.invalidate_demographic_breakdown whenever a vote is cast
+DEMOGRAPHIC_BREAKDOWN_CACHE_TIMEOUT = Cache.DAY
+
+USER_POPULATIONS_CACHE_KEY = "portal:user_populations:{user_id}"
+USER_POPULATIONS_CACHE_TIMEOUT = Cache.HOUR
+# order of the lists returned by get_user_populations
+POPULATION_KINDS = [
+    TargetPopulation.KIND_YEAR,
+    TargetPopulation.KIND_SCHOOL,
+    TargetPopulation.KIND_MAJOR,
+    TargetPopulation.KIND_DEGREE,
+]
+
 
 def get_user_info(user):
     """Returns Platform user information"""
@@ -19,12 +43,25 @@ def get_user_info(user):
     return json.loads(response.content)
 
 
-def get_user_clubs(user):
-    """Returns list of clubs that user is a member of"""
+def get_user_clubs(user, refresh=False):
+    """
+    Returns list of clubs that user is a member of. Memoized on the user for the rest of
+    the request and cached across requests, pass `refresh` to fetch it from Penn Clubs again.
+    """
+    key = USER_CLUBS_CACHE_KEY.format(user_id=user.id)
+    if not refresh:
+        if (clubs := getattr(user, "_cached_clubs", None)) is not None:
+            return clubs
+        if (clubs := cache.get(key)) is not None:
+            user._cached_clubs = clubs
+            return clubs
+
     response = authenticated_request(user, "GET", "https://pennclubs.com/api/memberships/")
     if response.status_code == 403:
         raise PermissionDenied("IPC request failed")
     res_json = json.loads(response.content)
+    cache.set(key, res_json, USER_CLUBS_CACHE_TIMEOUT)
+    user._cached_clubs = res_json
     return res_json
 
 
@@ -37,91 +74,119 @@ def get_club_info(user, club_code):
     return {"name": res_json["name"], "image": res_json["image_url"], "club_code": club_code}
 
 
-def get_user_populations(user):
-    """Returns the target populations that the user belongs to"""
-
-    user_info = get_user_info(user)
-
-    year = (
-        [
-            TargetPopulation.objects.get(
-                kind=TargetPopulation.KIND_YEAR, population=user_info["student"]["graduation_year"]
-            )
-        ]
-        if user_info["student"]["graduation_year"]
-        else []
-    )
+def get_clubs_info(user, club_codes):
+    """Returns get_club_info for every club code, fetched concurrently"""
+    if not club_codes:
+        return []
+    # refresh the access token once up front, the workers only send requests
+    if not ensure_access_token(user):
+        raise PermissionDenied("IPC request failed")
+    with ThreadPoolExecutor(max_workers=min(len(club_codes), CLUB_INFO_MAX_WORKERS)) as executor:
+        return list(executor.map(lambda club_code: get_club_info(user, club_code), club_codes))
 
-    school = (
-        [
-            TargetPopulation.objects.get(kind=TargetPopulation.KIND_SCHOOL, population=x["name"])
-            for x in user_info["student"]["school"]
-        ]
-        if user_info["student"]["school"]
-        else []
-    )
 
-    major = (
-        [
-            TargetPopulation.objects.get(kind=TargetPopulation.KIND_MAJOR, population=x["name"])
-            for x in user_info["student"]["major"]
-        ]
-        if user_info["student"]["major"]
-        else []
-    )
+def get_user_populations(user):
+    """
+    Returns the target populations that the user belongs to, as
+    [year, school, major, degree] lists. Cached per user, since it costs an IPC request.
+    """
 
-    degree = (
-        [
-            TargetPopulation.objects.get(
-                kind=TargetPopulation.KIND_DEGREE, population=x["degree_type"]
+    key = USER_POPULATIONS_CACHE_KEY.format(user_id=user.id)
+    if (populations := cache.get(key)) is None:
+        populations = resolve_user_populations(get_user_info(user))
+        cache.set(key, populations, USER_POPULATIONS_CACHE_TIMEOUT)
+    return populations
+
+
+def resolve_user_populations(user_info):
+    """Looks up the target populations of a Platform user in one query"""
+
+    student = user_info["student"]
+    wanted = [
+        (
+            [(TargetPopulation.KIND_YEAR, student["graduation_year"])]
+            if student["graduation_year"]
+            else []
+        ),
+        [(TargetPopulation.KIND_SCHOOL, x["name"]) for x in student["school"] or []],
+        [(TargetPopulation.KIND_MAJOR, x["name"]) for x in student["major"] or []],
+        [(TargetPopulation.KIND_DEGREE, x["degree_type"]) for x in student["major"] or []],
+    ]
+    if not any(wanted):
+        return wanted
+
+    found = {
+        (population.kind, population.population): population
+        for population in TargetPopulation.objects.filter(
+            reduce(
+                operator.or_,
+                (
+                    Q(kind=kind, population=population)
+                    for kind, population in itertools.chain(*wanted)
+                ),
             )
-            for x in user_info["student"]["major"]
-        ]
-        if user_info["student"]["major"]
-        else []
-    )
-
-    return [year, school, major, degree]
+        )
+    }
+    try:
+        return [[found[(kind, str(population))] for kind, population in x] for x in wanted]
+    except KeyError as e:
+        raise TargetPopulation.DoesNotExist(f"TargetPopulation {e} does not exist.")
 
 
-def check_targets(obj, user):
+def check_targets(obj, user, populations=None):
     """
-    Check if user aligns with target populations of poll or post
+    Check if user aligns with target populations of poll or post.
+    Pass `populations` when checking many objects for the same user, and prefetch
+    target_populations, to avoid any queries per object.
     """
 
-    populations = get_user_populations(user)
+    if populations is None:
+        populations = get_user_populations(user)
 
-    year = set(obj.target_populations.filter(kind=TargetPopulation.KIND_YEAR))
-    school = set(obj.target_populations.filter(kind=TargetPopulation.KIND_SCHOOL))
-    major = set(obj.target_populations.filter(kind=TargetPopulation.KIND_MAJOR))
-    degree = set(obj.target_populations.filter(kind=TargetPopulation.KIND_DEGREE))
+    targets = defaultdict(set)
+    for target_population in obj.target_populations.all():
+        targets[target_population.kind].add(target_population)
 
-    return (
-        set(populations[0]).issubset(year)
-        and set(populations[1]).issubset(school)
-        and set(populations[2]).issubset(major)
-        and set(populations[3]).issubset(degree)
+    return all(
+        set(user_populations).issubset(targets[kind])
+        for kind, user_populations in zip(POPULATION_KINDS, populations)
     )
 
 
 def get_demographic_breakdown(poll_id):
-    """Collects Poll statistics on school and graduation year demographics"""
+    """
+    Collects Poll statistics on school and graduation year demographics,
+    as one grouped query over the votes' options and target populations
+    """
+
+    key = DEMOGRAPHIC_BREAKDOWN_CACHE_KEY.format(poll_id=poll_id)
+    if (data := cache.get(key)) is not None:
+        return data
 
     # passing in id is necessary because
     # poll info is already serialized
-    poll = Poll.objects.get(id=poll_id)
-    data = []
-
-    # gets all options for the poll
-    options = PollOption.objects.filter(poll=poll)
-    for option in options:
-        context = {"option": option.choice, "breakdown": defaultdict(lambda: defaultdict(int))}
-        # gets all votes for the option
-        votes = PollVote.objects.filter(poll_options__in=[option])
-        for vote in votes:
-            # goes through each vote and adds +1 to the
-            # target populations that the voter belongs to
-            for target_population in vote.target_populations.all():
-                context["breakdown"][target_population.kind][target_population.population] += 1
-        data.append(context)
+    # one row per option and population the option's voters belong to,
+    # options without votes still get a row with no population
+    rows = (
+        PollOption.objects.filter(poll_id=poll_id)
+        .values(
+            "id",
+            "choice",
+            "pollvote__target_populations__kind",
+            "pollvote__target_populations__population",
+        )
+        .annotate(votes=Count("pollvote__target_populations"))
+        .order_by("id")
+    )
+
+    contexts = {}
+    for row in rows:
+        context = contexts.setdefault(row["id"], {"option": row["choice"], "breakdown": {}})
+        if row["votes"]:
+            kind = row["pollvote__target_populations__kind"]
+            population = row["pollvote__target_populations__population"]
+            context["breakdown"].setdefault(kind, {})[population] = row["votes"]
+
+    data = list(contexts.values())
+    cache.set(key, data, DEMOGRAPHIC_BREAKDOWN_CACHE_TIMEOUT)
     return data
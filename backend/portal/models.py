@@ -1,6 +1,9 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
 from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 
 from utils.email import get_backend_manager_emails, send_automated_email
@@ -117,6 +120,29 @@ class PollVote(models.Model):
     target_populations = models.ManyToManyField(TargetPopulation, blank=True)
 
 
+# cached by portal.logic.get_demographic_breakdown
+DEMOGRAPHIC_BREAKDOWN_CACHE_KEY = "portal:demographic_breakdown:{poll_id}"
+
+
+@receiver(post_save, sender=PollOption)
+@receiver(post_delete, sender=PollOption)
+@receiver(post_save, sender=PollVote)
+@receiver(post_delete, sender=PollVote)
+@receiver(m2m_changed, sender=PollVote.poll_options.through)
+@receiver(m2m_changed, sender=PollVote.target_populations.through)
+def invalidate_demographic_breakdown(sender, instance, **kwargs):
+    """
+    Drops the cached breakdown of the poll that a vote or option belongs to.
+    PollVoteSerializer bulk inserts a vote's m2m rows, so saving the vote must invalidate too.
+    """
+    # both PollVotes and PollOptions have a poll, m2m changes can be sent from either side
+    if (poll_id := getattr(instance, "poll_id", None)) is None:
+        return
+    key = DEMOGRAPHIC_BREAKDOWN_CACHE_KEY.format(poll_id=poll_id)
+    # after commit, so a read racing the vote can't cache the breakdown without it
+    transaction.on_commit(lambda: cache.delete(key))
+
+
 class Post(Content):
     title = models.CharField(max_length=255)
     subtitle = models.CharField(max_length=255)
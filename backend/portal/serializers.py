@@ -1,3 +1,5 @@
+from django.db import transaction
+from django.db.models import F
 from django.http.request import QueryDict
 from rest_framework import serializers
 
@@ -130,6 +132,11 @@ class RetrievePollSerializer(serializers.ModelSerializer):
             "target_populations",
         )
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Prefetches the nested fields, so a list costs a constant number of queries"""
+        return queryset.prefetch_related("target_populations", "polloption_set")
+
 
 class PollVoteSerializer(serializers.ModelSerializer):
     class Meta:
@@ -142,7 +149,8 @@ class PollVoteSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
 
-        options = validated_data["poll_options"]
+        # an option listed twice is voted for once
+        options = list(dict.fromkeys(validated_data["poll_options"]))
         id_hash = validated_data["id_hash"]
 
         poll = options[0].poll
@@ -163,28 +171,40 @@ class PollVoteSerializer(serializers.ModelSerializer):
                     detail={"detail": "Voting options are from different Polls"}
                 )
 
+        # populations are looked up once, for both the check and the vote
+        populations = get_user_populations(self.context["request"].user)
+
         # # check if user is in target population
-        if not check_targets(poll, self.context["request"].user):
+        if not check_targets(poll, self.context["request"].user, populations):
             raise serializers.ValidationError(
                 detail={"detail": "You cannot vote for this poll (not in any target population)"}
             )
 
-        # adds poll to the vote
-        validated_data["poll"] = poll
-
-        # increments poll options vote count from the vote
-        for option in options:
-            option.vote_count += 1
-            option.save()
-
-        # add populations to poll data
-        populations = get_user_populations(self.context["request"].user)
-        population_list = populations[0] + populations[1] + populations[2] + populations[3]
+        # a user can be in the same degree population through several majors
+        population_ids = {x.id for population in populations for x in population}
 
-        # populates target populations
-        validated_data["target_populations"] = [x.id for x in population_list]
+        with transaction.atomic():
+            vote = PollVote.objects.create(id_hash=id_hash, poll=poll)
+            PollVote.poll_options.through.objects.bulk_create(
+                [
+                    PollVote.poll_options.through(pollvote=vote, polloption=option)
+                    for option in options
+                ]
+            )
+            PollVote.target_populations.through.objects.bulk_create(
+                [
+                    PollVote.target_populations.through(
+                        pollvote=vote, targetpopulation_id=population_id
+                    )
+                    for population_id in population_ids
+                ]
+            )
+            # increments poll options vote count in the database, so concurrent votes add up
+            PollOption.objects.filter(id__in=[option.id for option in options]).update(
+                vote_count=F("vote_count") + 1
+            )
 
-        return super().create(validated_data)
+        return vote
 
 
 class RetrievePollVoteSerializer(serializers.ModelSerializer):
@@ -201,6 +221,13 @@ class RetrievePollVoteSerializer(serializers.ModelSerializer):
             "created_date",
         )
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Prefetches the nested fields, so a list costs a constant number of queries"""
+        return queryset.select_related("poll").prefetch_related(
+            "poll_options", "poll__target_populations", "poll__polloption_set"
+        )
+
 
 class PostSerializer(ContentSerializer):
 
@@ -232,6 +259,11 @@ class PostSerializer(ContentSerializer):
             "image_url",
         )
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Prefetches the nested fields, so a list costs a constant number of queries"""
+        return queryset.prefetch_related("target_populations")
+
     def is_valid(self, *args, **kwargs):
         if isinstance(self.initial_data, QueryDict):
             self.initial_data = self.initial_data.dict()
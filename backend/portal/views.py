@@ -11,10 +11,11 @@ from rest_framework.views import APIView
 from pennmobile.analytics import Metric, record_analytics
 from portal.logic import (
     check_targets,
-    get_club_info,
+    get_clubs_info,
     get_demographic_breakdown,
     get_user_clubs,
     get_user_info,
+    get_user_populations,
 )
 from portal.models import Poll, PollOption, PollVote, Post, TargetPopulation
 from portal.permissions import (
@@ -48,14 +49,17 @@ class UserInfo(APIView):
 
 
 class UserClubs(APIView):
-    """Returns list of clubs a User can post on the behalf of"""
+    """
+    Returns list of clubs a User can post on the behalf of.
+    Pass ?refresh=true to skip the cached club memberships.
+    """
 
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        club_data = []
-        for club in get_user_clubs(request.user):
-            club_data.append(get_club_info(request.user, club["club"]["code"]))
+        refresh = request.query_params.get("refresh", "false").lower() == "true"
+        clubs = get_user_clubs(request.user, refresh=refresh)
+        club_data = get_clubs_info(request.user, [club["club"]["code"] for club in clubs])
         return Response({"clubs": club_data})
 
 
@@ -98,7 +102,7 @@ class Polls(viewsets.ModelViewSet):
             else Poll.objects.filter(
                 club_code__in=[x["club"]["code"] for x in get_user_clubs(self.request.user)]
             )
-        )
+        ).prefetch_related("target_populations")
 
     @action(detail=False, methods=["post"])
     def browse(self, request):
@@ -129,8 +133,9 @@ class Polls(viewsets.ModelViewSet):
         # target populations
         bad_polls = []
         if not request.user.is_superuser:
-            for unfiltered_poll in unfiltered_polls:
-                if not check_targets(unfiltered_poll, request.user):
+            populations = get_user_populations(request.user)
+            for unfiltered_poll in unfiltered_polls.prefetch_related("target_populations"):
+                if not check_targets(unfiltered_poll, request.user, populations):
                     bad_polls.append(unfiltered_poll.id)
 
         # excludes the bad polls
@@ -149,17 +154,21 @@ class Polls(viewsets.ModelViewSet):
         #     ).data
         # )
 
+        polls = polls.distinct().order_by("-priority", "start_date", "expire_date")
         return Response(
             RetrievePollSerializer(
-                polls.distinct().order_by("-priority", "start_date", "expire_date"), many=True
+                RetrievePollSerializer.setup_eager_loading(polls), many=True
             ).data
         )
 
     @action(detail=False, methods=["get"], permission_classes=[IsSuperUser])
     def review(self, request):
         """Returns list of all Polls that admins still need to approve of"""
+        polls = Poll.objects.filter(status=Poll.STATUS_DRAFT)
         return Response(
-            RetrievePollSerializer(Poll.objects.filter(status=Poll.STATUS_DRAFT), many=True).data
+            RetrievePollSerializer(
+                RetrievePollSerializer.setup_eager_loading(polls), many=True
+            ).data
         )
 
     @action(detail=True, methods=["get"])
@@ -224,7 +233,11 @@ class PollVotes(viewsets.ModelViewSet):
         id_hash = request.data["id_hash"]
 
         poll_votes = PollVote.objects.filter(id_hash=id_hash).order_by("-created_date")
-        return Response(RetrievePollVoteSerializer(poll_votes, many=True).data)
+        return Response(
+            RetrievePollVoteSerializer(
+                RetrievePollVoteSerializer.setup_eager_loading(poll_votes), many=True
+            ).data
+        )
 
     def create(self, request, *args, **kwargs):
         record_analytics(Metric.PORTAL_POLL_VOTED, request.user.username)
@@ -271,7 +284,7 @@ class Posts(viewsets.ModelViewSet):
     serializer_class = PostSerializer
 
     def get_queryset(self):
-        return (
+        return PostSerializer.setup_eager_loading(
             Post.objects.all()
             if self.request.user.is_superuser
             else Post.objects.filter(
@@ -311,15 +324,11 @@ class Posts(viewsets.ModelViewSet):
         # excludes the bad polls
         posts = unfiltered_posts.exclude(id__in=bad_posts)
 
-        return Response(
-            PostSerializer(
-                posts.distinct().order_by("-priority", "start_date", "expire_date"), many=True
-            ).data
-        )
+        posts = posts.distinct().order_by("-priority", "start_date", "expire_date")
+        return Response(PostSerializer(PostSerializer.setup_eager_loading(posts), many=True).data)
 
     @action(detail=False, methods=["get"], permission_classes=[IsSuperUser])
     def review(self, request):
         """Returns a list of all Posts that admins still need to approve of"""
-        return Response(
-            PostSerializer(Post.objects.filter(status=Poll.STATUS_DRAFT), many=True).data
-        )
+        posts = Post.objects.filter(status=Poll.STATUS_DRAFT)
+        return Response(PostSerializer(PostSerializer.setup_eager_loading(posts), many=True).data)
@@ -1,19 +1,23 @@
 import datetime
 import json
+from io import StringIO
 from unittest import mock
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.management import call_command
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework.test import APIClient
 
 from dining.api_wrapper import APIError, DiningAPIWrapper
-from dining.models import DiningMenu, Venue
+from dining.models import DiningMenu, DiningStation, Venue
 
 
 User = get_user_model()
 
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
 
 def mock_dining_requests(url, *args, **kwargs):
     class Mock:
@@ -64,26 +68,26 @@ class TestTokenAndRequest(TestCase):
         self.assertEqual(prev_token, self.wrapper.token)
         self.assertEqual(prev_expiration, self.wrapper.expiration)
 
-    @mock.patch("requests.post", mock_request_post_error)
+    @mock.patch("utils.http.post", mock_request_post_error)
     def test_update_token_error(self):
         with self.assertRaises(APIError):
             self.wrapper.update_token()
 
-    @mock.patch("requests.post", mock_dining_requests)
-    @mock.patch("requests.request", lambda **kwargs: None)
+    @mock.patch("utils.http.post", mock_dining_requests)
+    @mock.patch("utils.http.request", lambda **kwargs: None)
     def test_request_headers_update(self):
         res = self.wrapper.request(headers=dict())
         self.assertIsNone(res)
 
-    @mock.patch("requests.post", mock_dining_requests)
-    @mock.patch("requests.request", mock_request_raise_error)
+    @mock.patch("utils.http.post", mock_dining_requests)
+    @mock.patch("utils.http.request", mock_request_raise_error)
     def test_request_api_error(self):
         with self.assertRaises(APIError):
             self.wrapper.request()
 
 
-@mock.patch("requests.post", mock_dining_requests)
-@mock.patch("requests.request", mock_dining_requests)
+@mock.patch("utils.http.post", mock_dining_requests)
+@mock.patch("utils.http.request", mock_dining_requests)
 class TestVenues(TestCase):
     def setUp(self):
         call_command("load_venues")
@@ -100,10 +104,57 @@ class TestVenues(TestCase):
                 self.assertIn("dayparts", day)
         self.assertEqual(15, len(response.json()))
 
+    def test_get_venues_num_queries(self):
+        with self.assertNumQueries(1):
+            venues = DiningAPIWrapper().get_venues()
+        self.assertEqual("1920 Commons", next(v for v in venues if v["id"] == 593)["name"])
+
+    def test_unknown_venue(self):
+        Venue.objects.filter(venue_id=593).delete()
+        venues = DiningAPIWrapper().get_venues()
+        self.assertIsNone(next(v for v in venues if v["id"] == 593)["name"])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@mock.patch("utils.http.post", mock_dining_requests)
+@mock.patch("utils.http.request", mock_dining_requests)
+class TestVenuesCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        call_command("load_venues")
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_refresh_venues(self):
+        out = StringIO()
+        call_command("refresh_venues", stdout=out)
+        self.assertEqual("Refreshed Dining Venues!\n", out.getvalue())
+
+        with mock.patch("utils.http.request") as request:
+            with self.assertNumQueries(0):
+                response = self.client.get(reverse("venues"))
+        request.assert_not_called()
+        self.assertEqual(15, len(response.json()))
+
+    def test_cached_on_miss(self):
+        response = self.client.get(reverse("venues"))
+        with mock.patch("utils.http.request") as request:
+            self.assertEqual(response.json(), self.client.get(reverse("venues")).json())
+        request.assert_not_called()
+
+    def test_token_shared(self):
+        DiningAPIWrapper().update_token()
+        with mock.patch("utils.http.post") as post:
+            wrapper = DiningAPIWrapper()
+            wrapper.update_token()
+        post.assert_not_called()
+        self.assertIsNotNone(wrapper.token)
+
 
 class TestMenus(TestCase):
-    @mock.patch("requests.post", mock_dining_requests)
-    @mock.patch("requests.request", mock_dining_requests)
+    @mock.patch("utils.http.post", mock_dining_requests)
+    @mock.patch("utils.http.request", mock_dining_requests)
     def setUp(self):
         Venue.objects.create(
             venue_id=593,
@@ -139,7 +190,62 @@ class TestMenus(TestCase):
         response = self.client.get("/dining/menus/2022-10-04/")
         self.try_structure(response.json())
 
-    @mock.patch("requests.request", mock_dining_requests)
+    @mock.patch("utils.http.post", mock_dining_requests)
+    @mock.patch("utils.http.request", mock_dining_requests)
+    def test_reload_menu(self):
+        counts = (
+            DiningMenu.objects.count(),
+            DiningStation.objects.count(),
+            DiningStation.items.through.objects.count(),
+        )
+        self.assertGreater(counts[2], 0)
+
+        # nothing changed, so nothing is written
+        with self.assertNumQueries(2):
+            call_command("load_next_menu")
+        self.assertEqual(
+            counts,
+            (
+                DiningMenu.objects.count(),
+                DiningStation.objects.count(),
+                DiningStation.items.through.objects.count(),
+            ),
+        )
+
+    @mock.patch("utils.http.post", mock_dining_requests)
+    def test_sync_changed_menu(self):
+        with open("tests/dining/menu.json") as data:
+            response = json.load(data)
+        dayparts = response["menus"]["days"][0]["cafes"]["593"]["dayparts"][0]
+        dayparts[1]["stations"][0]["label"] = "new station"
+        dayparts.pop()
+
+        breakfast = DiningMenu.objects.get(service="Breakfast")
+        breakfast_stations = set(breakfast.stations.values_list("id", flat=True))
+        lunch = DiningMenu.objects.get(service="Lunch")
+
+        with mock.patch.object(DiningAPIWrapper, "get_menu", return_value=response):
+            count = DiningAPIWrapper().sync_menus(datetime.date(2022, 10, 4))
+
+        self.assertEqual(1, count)
+        self.assertFalse(DiningMenu.objects.filter(service="Dinner").exists())
+        self.assertEqual(
+            breakfast_stations,
+            set(DiningStation.objects.filter(menu=breakfast).values_list("id", flat=True)),
+        )
+        self.assertEqual(lunch.id, DiningMenu.objects.get(service="Lunch").id)
+        self.assertTrue(lunch.stations.filter(name="new station").exists())
+
+    @mock.patch("utils.http.post", mock_dining_requests)
+    @mock.patch("utils.http.request", mock_dining_requests)
+    def test_sync_menus_command(self):
+        DiningMenu.objects.all().delete()
+        out = StringIO()
+        call_command("sync_menus", "--days", "2", stdout=out)
+        self.assertEqual("Synced 3 dining menus!\n", out.getvalue())
+        self.assertEqual(3, DiningMenu.objects.count())
+
+    @mock.patch("utils.http.request", mock_dining_requests)
     def test_skip_venue(self):
         Venue.objects.all().delete()
         Venue.objects.create(venue_id=747, name="Skip", image_url="URL")
@@ -148,6 +254,60 @@ class TestMenus(TestCase):
         self.assertEqual(DiningMenu.objects.count(), 0)
 
 
+@override_settings(CACHES=LOCMEM_CACHES)
+@mock.patch(
+    "django.utils.timezone.now",
+    lambda: datetime.datetime(2022, 10, 4, 12, tzinfo=datetime.timezone.utc),
+)
+class TestMenusCache(TestCase):
+    @mock.patch("utils.http.post", mock_dining_requests)
+    @mock.patch("utils.http.request", mock_dining_requests)
+    def setUp(self):
+        cache.clear()
+        Venue.objects.create(venue_id=593, name="1920 Commons", image_url="URL")
+        DiningAPIWrapper().sync_menus(datetime.date(2022, 10, 4))
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_cached(self):
+        # menus with their venue, stations and items
+        with self.assertNumQueries(3):
+            response = self.client.get("/dining/menus/2022-10-04/")
+        self.assertEqual(["Breakfast", "Lunch", "Dinner"], [m["service"] for m in response.json()])
+        for menu in response.json():
+            self.assertNotIn("content_hash", menu)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(response.json(), self.client.get("/dining/menus/2022-10-04/").json())
+
+    def test_week_cached(self):
+        menus = self.client.get(reverse("menus")).json()
+        self.assertEqual(3, len(menus))
+        with self.assertNumQueries(0):
+            self.assertEqual(menus, self.client.get(reverse("menus")).json())
+
+    def test_outside_sync_window(self):
+        # sync_menus never refreshes these days, so they aren't cached
+        for date in ["2022-10-03", "2022-10-11"]:
+            self.assertEqual([], self.client.get(f"/dining/menus/{date}/").json())
+            with self.assertNumQueries(1):
+                self.client.get(f"/dining/menus/{date}/")
+
+    @mock.patch("utils.http.post", mock_dining_requests)
+    def test_invalidated_by_loader(self):
+        self.client.get("/dining/menus/2022-10-04/")
+
+        with open("tests/dining/menu.json") as data:
+            response = json.load(data)
+        response["menus"]["days"][0]["cafes"]["593"]["dayparts"][0].pop()
+        with mock.patch.object(DiningAPIWrapper, "get_menu", return_value=response):
+            DiningAPIWrapper().sync_menus(datetime.date(2022, 10, 4))
+
+        menus = self.client.get("/dining/menus/2022-10-04/").json()
+        self.assertEqual(["Breakfast", "Lunch"], [m["service"] for m in menus])
+
+
 class TestPreferences(TestCase):
     def setUp(self):
         call_command("load_venues")
@@ -31,6 +31,10 @@ def wharton_availability(*args):
         return json.load(data)
 
 
+def all_availability(*args):
+    return [libcal_availability(), wharton_availability()]
+
+
 def book_cancel_room(*args):
     pass
 
@@ -134,6 +138,16 @@ class TestGSRFunctions(TestCase):
             self.assertIn("id", room)
             self.assertIn("availability", room)
 
+    @mock.patch("gsr_booking.api_wrapper.BookingHandler.get_all_availability", all_availability)
+    def test_all_availability(self):
+        response = self.client.get(reverse("all-availability"))
+        res_json = json.loads(response.content)
+        self.assertEqual(2, len(res_json))
+        for location in res_json:
+            self.assertIn("name", location)
+            self.assertIn("gid", location)
+            self.assertIn("rooms", location)
+
     @mock.patch("gsr_booking.api_wrapper.BookingHandler.book_room", book_cancel_room)
     def test_book_libcal(self):
         payload = {
@@ -3,8 +3,9 @@ from datetime import timedelta
 from unittest import mock
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.management import call_command
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.utils import timezone
 from rest_framework.test import APIClient
 
@@ -51,6 +52,9 @@ def mock_requests_get(obj, *args, **kwargs):
         return Mock(json.load(data), 200)
 
 
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
 class TestBookingWrapper(TestCase):
     def setUp(self):
         call_command("load_gsrs")
@@ -237,3 +241,111 @@ class TestBookingWrapper(TestCase):
         self.assertIn("room_name", availability["rooms"][0])
         self.assertIn("id", availability["rooms"][0])
         self.assertIn("availability", availability["rooms"][0])
+
+    @mock.patch("gsr_booking.api_wrapper.WhartonBookingWrapper.request", mock_requests_get)
+    @mock.patch("gsr_booking.api_wrapper.LibCalBookingWrapper.request", mock_requests_get)
+    def test_all_availability(self):
+        availability = GSRBooker.get_all_availability("2021-01-07", "2022-01-08", self.user)
+        self.assertEqual(GSR.objects.count(), len(availability))
+        self.assertEqual(
+            sorted(GSR.objects.values_list("gid", flat=True)),
+            sorted(location["gid"] for location in availability),
+        )
+        for location in availability:
+            self.assertNotIn("error", location)
+            self.assertIn("name", location)
+            self.assertIn("room_name", location["rooms"][0])
+            self.assertIn("availability", location["rooms"][0])
+
+    @mock.patch("gsr_booking.api_wrapper.WhartonBookingWrapper.request", mock_requests_get)
+    @mock.patch("gsr_booking.api_wrapper.LibCalBookingWrapper.request", mock_requests_get)
+    def test_group_all_availability(self):
+        # no wharton members in the group, so only wharton locations fail
+        availability = GSRBooker.get_all_availability(
+            "2021-01-07", "2022-01-08", self.group_user, self.group
+        )
+        self.assertEqual(GSR.objects.count(), len(availability))
+        kinds = {gsr.gid: gsr.kind for gsr in GSR.objects.all()}
+        for location in availability:
+            if kinds[location["gid"]] == GSR.KIND_WHARTON:
+                self.assertIn("error", location)
+                self.assertEqual([], location["rooms"])
+            else:
+                self.assertNotIn("error", location)
+                self.assertNotEqual([], location["rooms"])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestAvailabilityCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        call_command("load_gsrs")
+        self.user = User.objects.create_user("user", "user@seas.upenn.edu", "user")
+
+    @mock.patch("gsr_booking.api_wrapper.LibCalBookingWrapper.request", autospec=True)
+    def test_libcal_availability_cached(self, mock_request):
+        mock_request.side_effect = mock_requests_get
+        first = GSRBooker.get_availability("1086", 1889, "2021-01-07", "2022-01-08", self.user)
+        calls = mock_request.call_count
+        second = GSRBooker.get_availability("1086", 1889, "2021-01-07", "2022-01-08", self.user)
+        self.assertEqual(calls, mock_request.call_count)
+        self.assertEqual(first, second)
+
+        # a different date range is a different entry
+        GSRBooker.get_availability("1086", 1889, "2021-01-08", "2022-01-08", self.user)
+        self.assertGreater(mock_request.call_count, calls)
+
+    @mock.patch("gsr_booking.api_wrapper.LibCalBookingWrapper.request", autospec=True)
+    def test_libcal_booking_invalidates(self, mock_request):
+        mock_request.side_effect = mock_requests_get
+        GSRBooker.get_availability("1086", 1889, "2021-01-07", "2022-01-08", self.user)
+        GSRBooker.book_room(
+            1889,
+            7192,
+            "VP WIC Booth 01",
+            "2021-12-05T16:00:00-05:00",
+            "2021-12-05T16:30:00-05:00",
+            self.user,
+        )
+        calls = mock_request.call_count
+        GSRBooker.get_availability("1086", 1889, "2021-01-07", "2022-01-08", self.user)
+        self.assertGreater(mock_request.call_count, calls)
+
+    @mock.patch("gsr_booking.api_wrapper.WhartonBookingWrapper.request", autospec=True)
+    def test_wharton_availability_per_user(self, mock_request):
+        other_user = User.objects.create_user("other", "other@wharton.upenn.edu", "other")
+
+        def request(obj, method, url, **kwargs):
+            response = mock_requests_get(obj, method, url, **kwargs)
+            for room in response.json_data:
+                room["room_name"] = url.split("/")[-4]
+            return response
+
+        mock_request.side_effect = request
+        for user in [self.user, other_user, self.user, other_user]:
+            availability = GSRBooker.get_availability("JMHH", 1, "2021-01-07", "2022-01-08", user)
+            self.assertEqual(user.username, availability["rooms"][0]["room_name"])
+        # each user's availability is cached separately
+        self.assertEqual(2, mock_request.call_count)
+
+    @mock.patch("gsr_booking.api_wrapper.WhartonBookingWrapper.request", autospec=True)
+    def test_wharton_cancel_invalidates(self, mock_request):
+        mock_request.side_effect = mock_requests_get
+        GSRBooker.get_availability("JMHH", 1, "2021-01-07", "2022-01-08", self.user)
+        calls = mock_request.call_count
+        GSRBooker.get_availability("JMHH", 1, "2021-01-07", "2022-01-08", self.user)
+        self.assertEqual(calls, mock_request.call_count)
+
+        reservation = Reservation.objects.create(creator=self.user)
+        GSRBooking.objects.create(
+            reservation=reservation,
+            user=self.user,
+            booking_id="987654",
+            gsr=GSR.objects.get(gid=1),
+            room_id=94,
+            room_name="241",
+        )
+        GSRBooker.cancel_room("987654", self.user)
+        calls = mock_request.call_count
+        GSRBooker.get_availability("JMHH", 1, "2021-01-07", "2022-01-08", self.user)
+        self.assertGreater(mock_request.call_count, calls)
@@ -1,9 +1,18 @@
 from unittest import mock
 
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from requests.exceptions import ConnectTimeout
 
-from laundry.api_wrapper import all_status, room_status, save_data
-from laundry.models import LaundryRoom, LaundrySnapshot
+from laundry.api_wrapper import (
+    ROOM_TIMEOUT,
+    all_status,
+    refresh_status,
+    room_status,
+    rooms_status,
+    save_data,
+)
+from laundry.models import LaundryHourlyUsage, LaundryRoom, LaundrySnapshot
 from tests.laundry.test_commands import mock_laundry_get
 
 
@@ -61,6 +70,17 @@ class TestAllStatus(TestCase):
                 self.assertIn("offline", data)
                 self.assertTrue(hall[machine]["offline"] >= 0)
 
+    def test_all_status_partial(self):
+        def flaky_laundry_get(url, *args, **kwargs):
+            if "14099" in url:
+                raise ConnectTimeout()
+            return mock_laundry_get(url, *args, **kwargs)
+
+        with mock.patch("laundry.api_wrapper.get_validated", flaky_laundry_get):
+            data = all_status()
+
+        self.assertEqual(["English House", "Harnwell 12th Floor"], list(data.keys()))
+
 
 @mock.patch("laundry.api_wrapper.get_validated", mock_laundry_get)
 class TestHallStatus(TestCase):
@@ -155,6 +175,107 @@ class TestSaveData(TestCase):
             self.assertTrue(snapshot.available_washers >= 0)
             self.assertTrue(snapshot.available_dryers >= 0)
 
+        # the hourly rollup is kept up to date
+        usages = LaundryHourlyUsage.objects.all()
+        self.assertEqual(3, len(usages))
+        for usage in usages:
+            snapshot = LaundrySnapshot.objects.get(room=usage.room)
+            self.assertEqual(1, usage.count)
+            self.assertEqual(snapshot.available_washers, usage.sum_washers)
+            self.assertEqual(snapshot.available_dryers, usage.sum_dryers)
+
+        # snapshots are only taken once per interval
         save_data()
 
-        self.assertEqual(LaundrySnapshot.objects.all().count(), 6)
+        self.assertEqual(LaundrySnapshot.objects.all().count(), 3)
+        self.assertEqual(LaundrySnapshot.objects.values("date").distinct().count(), 1)
+
+    def test_save_data_fills_missing_rooms(self):
+        def flaky_laundry_get(url, *args, **kwargs):
+            if "14099" in url:
+                raise ConnectTimeout()
+            return mock_laundry_get(url, *args, **kwargs)
+
+        with mock.patch("laundry.api_wrapper.get_validated", flaky_laundry_get):
+            save_data()
+        self.assertEqual(LaundrySnapshot.objects.all().count(), 2)
+
+        # a rerun in the same interval only polls the room that failed
+        with mock.patch("laundry.api_wrapper.get_validated") as mock_get:
+            mock_get.side_effect = mock_laundry_get
+            save_data()
+        self.assertEqual(1, mock_get.call_count)
+        self.assertEqual(LaundrySnapshot.objects.all().count(), 3)
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class TestCachedStatus(TestCase):
+    def setUp(self):
+        cache.clear()
+        LaundryRoom.objects.get_or_create(
+            room_id=14089,
+            name="English House",
+            location="English House",
+            location_id=14146,
+            total_washers=3,
+            total_dryers=3,
+        )
+        LaundryRoom.objects.get_or_create(
+            room_id=14099,
+            name="Harnwell 10th Floor",
+            location="Harnwell College House",
+            location_id=14150,
+            total_washers=3,
+            total_dryers=3,
+        )
+
+    def test_refresh_status(self):
+        with mock.patch("laundry.api_wrapper.get_validated", mock_laundry_get):
+            self.assertEqual(2, refresh_status())
+
+        # served from the cache without touching the laundry api
+        with mock.patch("laundry.api_wrapper.get_validated") as mock_get:
+            statuses = rooms_status(list(LaundryRoom.objects.all()))
+        mock_get.assert_not_called()
+
+        self.assertEqual(2, len(statuses))
+        for status in statuses:
+            self.assertIn("last_updated", status)
+            self.assertIn("washers", status["machines"])
+            self.assertIn("details", status["machines"])
+
+    def test_refresh_status_error(self):
+        with mock.patch("laundry.api_wrapper.get_validated", mock_laundry_get):
+            refresh_status()
+        rooms = list(LaundryRoom.objects.all())
+        statuses = rooms_status(rooms)
+
+        # the laundry API failing doesn't replace the last good status
+        with mock.patch("laundry.api_wrapper.get_validated", return_value=None):
+            self.assertEqual(0, refresh_status())
+            self.assertEqual(statuses, rooms_status(rooms))
+
+    def test_cache_miss_error(self):
+        room = LaundryRoom.objects.get(room_id=14089)
+        with mock.patch("laundry.api_wrapper.get_validated", return_value=None) as mock_get:
+            status = room_status(room)
+            self.assertIsNone(status["last_updated"])
+            self.assertEqual([], status["machines"]["details"])
+
+            # failures aren't cached, the next request tries again
+            room_status(room)
+            self.assertEqual(2, mock_get.call_count)
+
+    def test_cache_miss(self):
+        room = LaundryRoom.objects.get(room_id=14089)
+        with mock.patch("laundry.api_wrapper.get_validated") as mock_get:
+            mock_get.side_effect = mock_laundry_get
+            status = room_status(room)
+            self.assertEqual(ROOM_TIMEOUT, mock_get.call_args.kwargs["timeout"])
+            self.assertEqual(1, mock_get.call_count)
+            self.assertEqual("English House", status["hall_name"])
+            self.assertIn("last_updated", status)
+
+            # the fetched status is cached for the next request
+            self.assertEqual(status, room_status(room))
+            self.assertEqual(1, mock_get.call_count)
@@ -1,4 +1,5 @@
 import csv
+import datetime
 import json
 from io import StringIO
 from unittest import mock
@@ -6,8 +7,9 @@ from unittest import mock
 from django.conf import settings
 from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
 
-from laundry.models import LaundryRoom, LaundrySnapshot
+from laundry.models import LaundryHourlyUsage, LaundryRoom, LaundrySnapshot
 
 
 def mock_laundry_get(url, *args, **kwargs):
@@ -66,6 +68,70 @@ class TestGetSnapshot(TestCase):
         self.assertEqual(LaundrySnapshot.objects.all().count(), 3)
 
 
+class TestRollupLaundryUsage(TestCase):
+    def setUp(self):
+        self.room = LaundryRoom.objects.create(room_id=14089, name="English House")
+        now = timezone.localtime().replace(minute=0, second=0, microsecond=0)
+        self.hour = now - datetime.timedelta(days=1)
+        for minutes, washers in [(0, 1), (15, 2), (30, 3)]:
+            LaundrySnapshot.objects.create(
+                room=self.room,
+                date=self.hour + datetime.timedelta(minutes=minutes),
+                available_washers=washers,
+                available_dryers=0,
+            )
+
+    def test_rollup(self):
+        LaundryHourlyUsage.objects.all().delete()
+
+        out = StringIO()
+        call_command("rollup_laundry_usage", stdout=out)
+        self.assertEqual("Rebuilt laundry usage!\n", out.getvalue())
+
+        usage = LaundryHourlyUsage.objects.get()
+        self.assertEqual(self.hour.date(), usage.date)
+        self.assertEqual(self.hour.hour, usage.hour)
+        self.assertEqual(6, usage.sum_washers)
+        self.assertEqual(3, usage.count)
+
+        # rebuilding doesn't double count
+        call_command("rollup_laundry_usage", stdout=out)
+        self.assertEqual(3, LaundryHourlyUsage.objects.get().count)
+
+
+class TestCompactLaundrySnapshots(TestCase):
+    def setUp(self):
+        self.room = LaundryRoom.objects.create(room_id=14089, name="English House")
+        now = timezone.localtime().replace(minute=0, second=0, microsecond=0)
+        self.old = now - datetime.timedelta(days=90)
+        self.recent = now - datetime.timedelta(days=1)
+        for hour in [self.old, self.recent]:
+            for minutes, washers in [(0, 1), (15, 2), (30, 3)]:
+                LaundrySnapshot.objects.create(
+                    room=self.room,
+                    date=hour + datetime.timedelta(minutes=minutes),
+                    available_washers=washers,
+                    available_dryers=0,
+                )
+
+    def test_compact(self):
+        out = StringIO()
+        call_command("compact_laundry_snapshots", stdout=out)
+        self.assertEqual("Compacted 3 laundry snapshots!\n", out.getvalue())
+
+        # old snapshots only live on in the rollup, recent ones are kept
+        self.assertFalse(LaundrySnapshot.objects.filter(date__lt=self.recent).exists())
+        self.assertEqual(3, LaundrySnapshot.objects.count())
+        usage = LaundryHourlyUsage.objects.get(date=self.old.date(), hour=self.old.hour)
+        self.assertEqual(6, usage.sum_washers)
+        self.assertEqual(3, usage.count)
+
+        # rebuilding the rollup afterwards keeps the compacted hours
+        call_command("rollup_laundry_usage", "--days", "100", stdout=out)
+        usage.refresh_from_db()
+        self.assertEqual(3, usage.count)
+
+
 @mock.patch("laundry.api_wrapper.get_validated", mock_laundry_get)
 class TestLaundryRoomMigration(TestCase):
     def test_db_populate(self):
@@ -1,3 +1,4 @@
+import datetime
 import json
 from unittest import mock
 
@@ -151,6 +152,27 @@ class MultipleHallInfoViewTestCase(TestCase):
         response = self.client.get(reverse("multiple-hall-info", args=["1000000"]))
         self.assertEqual(404, response.status_code)
 
+    def test_batched_queries(self):
+        for room in LaundryRoom.objects.all():
+            LaundrySnapshot.objects.create(room=room, available_washers=1, available_dryers=2)
+
+        # one query for the rooms and one for the usage of every room
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("multiple-hall-info", args=["14100,14089,14099"]))
+        self.assertEqual(200, response.status_code)
+
+        rooms = response.json()["rooms"]
+        self.assertEqual([14100, 14089, 14099], [room["id"] for room in rooms])
+        hour = str(timezone.localtime().hour)
+        for room in rooms:
+            self.assertEqual(room["hall_name"], room["usage_data"]["hall_name"])
+            self.assertEqual(1, room["usage_data"]["washer_data"][hour])
+            self.assertEqual(2, room["usage_data"]["dryer_data"][hour])
+
+    def test_missing_room(self):
+        response = self.client.get(reverse("multiple-hall-info", args=["14089,1000000"]))
+        self.assertEqual(404, response.status_code)
+
 
 @mock.patch("laundry.api_wrapper.get_validated", mock_laundry_get)
 class HallUsageViewTestCase(TestCase):
@@ -195,6 +217,25 @@ class HallUsageViewTestCase(TestCase):
         self.assertEqual(self.snapshot.available_washers, res_json["washer_data"][str(hour)])
         self.assertEqual(self.snapshot.available_dryers, res_json["dryer_data"][str(hour)])
 
+    def test_response_averages(self):
+        # a week ago at the same hour, and early the following morning
+        last_week = self.snapshot.date - datetime.timedelta(weeks=1)
+        next_morning = timezone.localtime().replace(
+            hour=1, minute=0, second=0, microsecond=0
+        ) + datetime.timedelta(days=1)
+        for date, washers in [(last_week, 1), (next_morning - datetime.timedelta(weeks=1), 2)]:
+            LaundrySnapshot.objects.create(
+                room=self.laundry_room, date=date, available_washers=washers, available_dryers=0
+            )
+
+        response = self.client.get(reverse("hall-usage", args=[self.laundry_room.room_id]))
+        res_json = json.loads(response.content)
+
+        hour = timezone.localtime().hour
+        self.assertEqual(2, res_json["washer_data"][str(hour)])
+        self.assertEqual(2, res_json["washer_data"]["25"])
+        self.assertEqual(str(timezone.localtime(last_week).date()), res_json["start_date"])
+
 
 @mock.patch("laundry.api_wrapper.get_validated", mock_laundry_get)
 class PreferencesTestCase(TestCase):
@@ -1,16 +1,19 @@
 import datetime
 import json
+from io import StringIO
 from unittest import mock
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.management import call_command
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework.test import APIClient
 
 from dining.models import Venue
 from laundry.models import LaundryRoom
+from penndata.api_wrapper import ARTICLE_CACHE_KEY, fetch_article
 from penndata.models import AnalyticsEvent, Event, FitnessRoom, FitnessSnapshot
 from portal.models import Poll, Post
 
@@ -26,6 +29,17 @@ def fakeFitnessGet(url, *args, **kwargs):
 
 User = get_user_model()
 
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+ARTICLE = {
+    "source": "The Daily Pennsylvanian",
+    "link": "https://www.thedp.com/article",
+    "title": "Title",
+    "subtitle": "Subtitle",
+    "timestamp": "Today",
+    "imageurl": "https://www.thedp.com/image.jpg",
+}
+
 
 class TestNews(TestCase):
     def test_response(self):
@@ -39,6 +53,47 @@ class TestNews(TestCase):
         self.assertIn("imageurl", res_json)
 
 
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestNewsCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        with open("tests/penndata/dp_frontpage.html", "rb") as f:
+            self.page = f.read()
+
+    def tearDown(self):
+        cache.clear()
+
+    def dp_response(self, status_code=200):
+        return mock.MagicMock(status_code=status_code, content=self.page, headers={"ETag": '"v1"'})
+
+    def test_response(self):
+        with mock.patch("utils.http.get", return_value=self.dp_response()) as mock_get:
+            self.client.get(reverse("news"))
+            response = self.client.get(reverse("news"))
+
+        # parsed once, then served from the cache
+        mock_get.assert_called_once()
+        res_json = json.loads(response.content)
+        self.assertEqual("Penn Labs ships a new app", res_json["title"])
+        self.assertEqual("01/23/24 9:00pm", res_json["timestamp"])
+        self.assertEqual("https://www.thedp.com/article/2024/01/penn-labs", res_json["link"])
+
+    def test_not_modified(self):
+        with mock.patch("utils.http.get", return_value=self.dp_response()):
+            article = fetch_article()
+        cache.set(ARTICLE_CACHE_KEY, article)
+
+        with mock.patch("utils.http.get", return_value=self.dp_response(304)) as mock_get:
+            self.assertEqual(article, fetch_article())
+        self.assertEqual('"v1"', mock_get.call_args.kwargs["headers"]["If-None-Match"])
+
+        # without a cached article there's nothing to revalidate
+        cache.delete(ARTICLE_CACHE_KEY)
+        with mock.patch("utils.http.get", return_value=self.dp_response()) as mock_get:
+            self.assertEqual(article, fetch_article())
+        self.assertNotIn("If-None-Match", mock_get.call_args.kwargs["headers"])
+
+
 class TestCalender(TestCase):
     def setUp(self):
         call_command("get_calendar")
@@ -137,6 +192,49 @@ class TestHomePage(TestCase):
         self.assertEqual(new_res_json[1]["type"], "news")
 
 
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestHomePageCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        LaundryRoom.objects.create(room_id=14089, name="English House")
+        self.client = APIClient()
+        self.test_user = User.objects.create_user("user", "user@a.com", "user")
+        self.client.force_authenticate(user=self.test_user)
+
+    def tearDown(self):
+        cache.clear()
+
+    @mock.patch("penndata.api_wrapper.fetch_article", return_value=ARTICLE)
+    @mock.patch("penndata.api_wrapper.fetch_app_version", return_value="2.0.0")
+    def test_refresh(self, mock_version, mock_article):
+        out = StringIO()
+        call_command("refresh_homepage", stdout=out)
+        self.assertEqual("Refreshed 2 home page values!\n", out.getvalue())
+
+        # served from the cache without fetching anything
+        mock_version.reset_mock()
+        mock_article.reset_mock()
+        response = self.client.get(reverse("homepage"), {"version": "1.0.0"})
+        cells = json.loads(response.content)["cells"]
+        self.assertEqual("new-version-released", cells[0]["type"])
+        self.assertEqual(ARTICLE, cells[2]["info"]["article"])
+        mock_version.assert_not_called()
+        mock_article.assert_not_called()
+
+    @mock.patch("penndata.api_wrapper.fetch_article", return_value=None)
+    @mock.patch("penndata.api_wrapper.fetch_app_version", return_value="2.0.0")
+    def test_cache_miss(self, mock_version, mock_article):
+        response = self.client.get(reverse("homepage"), {"version": "2.0.0"})
+        self.client.get(reverse("homepage"))
+        cells = json.loads(response.content)["cells"]
+        self.assertEqual(["dining", "news", "laundry"], [cell["type"] for cell in cells])
+        self.assertIsNone(cells[1]["info"]["article"])
+
+        # the version is cached after the first miss, the failed article is retried
+        self.assertEqual(1, mock_version.call_count)
+        self.assertEqual(2, mock_article.call_count)
+
+
 class TestGetRecentFitness(TestCase):
     def setUp(self):
         call_command("load_fitness_rooms")
@@ -193,6 +291,15 @@ class TestGetRecentFitness(TestCase):
 
         self.assertEqual(expected, res_json)
 
+    def test_num_queries(self):
+        for room in FitnessRoom.objects.all():
+            FitnessSnapshot.objects.create(room=room, date=self.new_time, count=self.new_count)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("fitness"))
+        for room_obj in json.loads(response.content):
+            self.assertEqual(self.new_count, room_obj["count"])
+
 
 @mock.patch("requests.get", fakeFitnessGet)
 class TestGetFitnessSnapshot(TestCase):
@@ -218,6 +325,56 @@ class TestGetFitnessSnapshot(TestCase):
         self.assertEqual(FitnessSnapshot.objects.all().count(), 9)
 
 
+class TestCompactFitnessSnapshots(TestCase):
+    def setUp(self):
+        self.room = FitnessRoom.objects.create(name="Pottruck")
+        now = timezone.localtime().replace(minute=0, second=0, microsecond=0)
+        self.old = now - datetime.timedelta(days=400)
+        for minutes, count in [(0, 10), (20, 20), (40, 30)]:
+            FitnessSnapshot.objects.create(
+                room=self.room,
+                date=self.old + datetime.timedelta(minutes=minutes),
+                count=count,
+                capacity=count / 2,
+            )
+        for minutes in [0, 20]:
+            FitnessSnapshot.objects.create(
+                room=self.room, date=now - datetime.timedelta(minutes=minutes), count=5
+            )
+
+    def test_compact(self):
+        out = StringIO()
+        call_command("compact_fitness_snapshots", stdout=out)
+        self.assertEqual("Compacted 2 fitness snapshots!\n", out.getvalue())
+
+        # old hour is averaged into one snapshot, recent ones are kept as is
+        self.assertEqual(3, FitnessSnapshot.objects.count())
+        compacted = FitnessSnapshot.objects.order_by("date").first()
+        self.assertEqual(self.old, compacted.date)
+        self.assertEqual(20, compacted.count)
+        self.assertEqual(10, compacted.capacity)
+
+        call_command("compact_fitness_snapshots", stdout=out)
+        self.assertEqual(3, FitnessSnapshot.objects.count())
+
+    def test_compact_dst(self):
+        # 05:xx and 06:xx UTC are both 01:xx local time on the day DST ends
+        start = datetime.datetime(2023, 11, 5, 5, tzinfo=datetime.timezone.utc)
+        for minutes, count in [(10, 10), (40, 20), (70, 30), (100, 40)]:
+            FitnessSnapshot.objects.create(
+                room=self.room, date=start + datetime.timedelta(minutes=minutes), count=count
+            )
+
+        before = datetime.datetime(2023, 11, 6, tzinfo=datetime.timezone.utc)
+        self.assertEqual(2, FitnessSnapshot.compact(before))
+        dst_snapshots = FitnessSnapshot.objects.filter(date__date="2023-11-05").order_by("date")
+        self.assertEqual([15, 35], [snapshot.count for snapshot in dst_snapshots])
+
+        # compacting again leaves the hours alone
+        self.assertEqual(0, FitnessSnapshot.compact(before))
+        self.assertEqual([15, 35], [snapshot.count for snapshot in dst_snapshots])
+
+
 class TestFitnessUsage(TestCase):
     def load_snapshots_1(self, date):
         # 6:00, 0
@@ -565,6 +722,21 @@ class TestFitnessUsage(TestCase):
         }
         self.assertEqual(res_json, expected)
 
+    def test_num_queries(self):
+        for i in range(28):
+            self.load_snapshots_1(self.date - datetime.timedelta(days=i))
+
+        # one query for the room, one for every snapshot in the range
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse("fitness-usage", args=[self.room.id]),
+                {"date": self.date.strftime("%Y-%m-%d"), "num_samples": 28},
+            )
+        res_json = json.loads(response.content)
+        self.assertEqual(
+            (self.date - datetime.timedelta(days=27)).strftime("%Y-%m-%d"), res_json["start_date"]
+        )
+
     def test_get_fitness_usage_error(self):
         response = self.client.get(reverse("fitness-usage", args=[self.room.id + 1]))
         self.assertEqual(response.status_code, 404)
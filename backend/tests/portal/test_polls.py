@@ -2,18 +2,32 @@ import datetime
 import json
 from unittest import mock
 
+from accounts.models import AccessToken
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.management import call_command
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.test import APIClient
 
+from portal.logic import (
+    check_targets,
+    get_clubs_info,
+    get_demographic_breakdown,
+    get_user_clubs,
+    get_user_populations,
+)
 from portal.models import Poll, PollOption, PollVote, TargetPopulation
 from utils.email import get_backend_manager_emails
 
 
 User = get_user_model()
 
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
 
 def mock_get_user_clubs(*args, **kwargs):
     with open("tests/portal/get_user_clubs.json") as data:
@@ -42,6 +56,11 @@ class TestUserClubs(TestCase):
         self.client = APIClient()
         self.test_user = User.objects.create_user("user", "user@seas.upenn.edu", "user")
         self.client.force_authenticate(user=self.test_user)
+        AccessToken.objects.create(
+            user=self.test_user,
+            token="token",
+            expires_at=timezone.now() + datetime.timedelta(hours=1),
+        )
 
     @mock.patch("portal.views.get_user_info", mock_get_user_info)
     def test_user_info(self):
@@ -49,13 +68,58 @@ class TestUserClubs(TestCase):
         res_json = json.loads(response.content)
         self.assertEqual(12345678, res_json["user"]["pennid"])
 
-    @mock.patch("portal.views.get_club_info", mock_get_club_info)
+    @mock.patch("portal.logic.get_club_info", mock_get_club_info)
     @mock.patch("portal.views.get_user_clubs", mock_get_user_clubs)
     def test_user_clubs(self):
         response = self.client.get("/portal/clubs/")
         res_json = json.loads(response.content)
         self.assertEqual("pennlabs", res_json["clubs"][0]["code"])
 
+    @override_settings(CACHES=LOCMEM_CACHES)
+    @mock.patch("portal.logic.authenticated_request")
+    def test_user_clubs_cached(self, mock_request):
+        cache.clear()
+        with open("tests/portal/get_user_clubs.json", "rb") as f:
+            mock_request.return_value = mock.MagicMock(status_code=200, content=f.read())
+
+        # memoized on the user, then cached across requests
+        get_user_clubs(self.test_user)
+        get_user_clubs(self.test_user)
+        self.assertEqual(1, mock_request.call_count)
+        clubs = get_user_clubs(User.objects.get(id=self.test_user.id))
+        self.assertEqual(1, mock_request.call_count)
+        self.assertEqual("pennlabs", clubs[0]["club"]["code"])
+
+        get_user_clubs(self.test_user, refresh=True)
+        self.assertEqual(2, mock_request.call_count)
+        cache.clear()
+
+    @mock.patch("portal.logic.get_club_info")
+    def test_clubs_info(self, mock_club_info):
+        mock_club_info.side_effect = lambda user, club_code: {"club_code": club_code}
+        codes = ["pennlabs", "pppjo", "pac"]
+        self.assertEqual(
+            [{"club_code": code} for code in codes], get_clubs_info(self.test_user, codes)
+        )
+        self.assertEqual([], get_clubs_info(self.test_user, []))
+
+    @mock.patch("utils.http._refresh_access_token")
+    @mock.patch("portal.logic.get_club_info")
+    def test_clubs_info_expired_token(self, mock_club_info, mock_refresh):
+        self.test_user.accesstoken.expires_at = timezone.now() - datetime.timedelta(hours=1)
+        self.test_user.accesstoken.save()
+        mock_club_info.side_effect = lambda user, club_code: {"club_code": club_code}
+
+        # refreshed once before fanning out to the workers
+        mock_refresh.return_value = True
+        get_clubs_info(self.test_user, ["pennlabs", "pppjo", "pac"])
+        mock_refresh.assert_called_once_with(self.test_user)
+
+        mock_refresh.return_value = False
+        with self.assertRaises(PermissionDenied):
+            get_clubs_info(self.test_user, ["pennlabs", "pppjo", "pac"])
+        self.assertEqual(3, mock_club_info.call_count)
+
 
 class TestPolls(TestCase):
     """Tests Create/Update/Retrieve for Polls and Poll Options"""
@@ -146,6 +210,73 @@ class TestPolls(TestCase):
         self.assertEqual(1, len(res_json))
         self.assertEqual(3, Poll.objects.all().count())
 
+    @mock.patch("portal.logic.get_user_info", mock_get_user_info)
+    def test_check_targets_num_queries(self):
+        # all of the user's populations are resolved in one query
+        with self.assertNumQueries(1):
+            populations = get_user_populations(self.test_user)
+
+        # and matched against prefetched populations without any
+        polls = Poll.objects.order_by("id").prefetch_related("target_populations")
+        with self.assertNumQueries(2):
+            matches = [check_targets(poll, self.test_user, populations) for poll in polls]
+        self.assertEqual([True, False], matches)
+
+    def add_polls(self, count, status):
+        populations = list(TargetPopulation.objects.all())
+        for i in range(count):
+            poll = Poll.objects.create(
+                club_code="pennlabs",
+                question=f"Poll {i}",
+                expire_date=timezone.localtime() + datetime.timedelta(days=1),
+                status=status,
+            )
+            poll.target_populations.set(populations)
+            options = [PollOption.objects.create(poll=poll, choice=str(j)) for j in range(3)]
+            vote = PollVote.objects.create(id_hash="voter", poll=poll)
+            vote.poll_options.set(options[:1])
+
+    def list_queries(self):
+        """Returns (number of queries, number of results) of every list endpoint"""
+        admin = User.objects.get_or_create(username="admin", is_superuser=True)[0]
+        requests = [
+            (self.test_user, "post", "/portal/polls/browse/", {"id_hash": 1}),
+            (self.test_user, "post", "/portal/votes/all/", {"id_hash": "voter"}),
+            (admin, "get", "/portal/polls/review/", None),
+        ]
+        results = []
+        for user, method, url, data in requests:
+            self.client.force_authenticate(user=user)
+            with CaptureQueriesContext(connection) as queries:
+                response = getattr(self.client, method)(url, data)
+            results.append((len(queries), len(json.loads(response.content))))
+        self.client.force_authenticate(user=self.test_user)
+        return results
+
+    @mock.patch("portal.logic.get_user_info", mock_get_user_info)
+    def test_list_num_queries(self):
+        self.add_polls(1, Poll.STATUS_APPROVED)
+        self.add_polls(1, Poll.STATUS_DRAFT)
+        before = self.list_queries()
+
+        self.add_polls(5, Poll.STATUS_APPROVED)
+        self.add_polls(5, Poll.STATUS_DRAFT)
+        after = self.list_queries()
+
+        # more results, same number of queries
+        self.assertEqual([(2, 7), (2, 12), (1, 6)], [(b[1], a[1]) for b, a in zip(before, after)])
+        self.assertEqual([b[0] for b in before], [a[0] for a in after])
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    @mock.patch("portal.logic.get_user_info", side_effect=mock_get_user_info)
+    def test_user_populations_cached(self, mock_info):
+        cache.clear()
+        self.client.post("/portal/polls/browse/", {"id_hash": 1})
+        response = self.client.post("/portal/polls/browse/", {"id_hash": 1})
+        self.assertEqual(1, len(json.loads(response.content)))
+        mock_info.assert_called_once()
+        cache.clear()
+
     @mock.patch("portal.serializers.get_user_clubs", mock_get_user_clubs)
     @mock.patch("portal.logic.get_user_info", mock_get_null_user_info)
     def test_null_user_info_browse(self):
@@ -344,6 +475,28 @@ class TestPollVotes(TestCase):
             PollVote.objects.all().first().target_populations.all(),
         )
 
+    @mock.patch("portal.logic.get_user_info", side_effect=mock_get_user_info)
+    def test_vote_counts(self, mock_info):
+        for id_hash in range(3):
+            payload = {"id_hash": id_hash, "poll_options": [self.p4_op1_id]}
+            self.client.post("/portal/votes/", payload)
+
+        # one Platform request per vote, shared by the target check and the vote
+        self.assertEqual(3, mock_info.call_count)
+        self.assertEqual(3, PollOption.objects.get(id=self.p4_op1_id).vote_count)
+        vote = PollVote.objects.filter(poll_id=self.p4_id).first()
+        self.assertEqual([self.p4_op1_id], [x.id for x in vote.poll_options.all()])
+        self.assertEqual(4, vote.target_populations.count())
+
+    @mock.patch("portal.logic.get_user_info", mock_get_user_info)
+    def test_vote_duplicate_options(self):
+        payload = {"id_hash": 1, "poll_options": [self.p4_op1_id, self.p4_op1_id]}
+        response = self.client.post("/portal/votes/", payload)
+        self.assertEqual(201, response.status_code)
+        self.assertEqual(1, PollOption.objects.get(id=self.p4_op1_id).vote_count)
+        vote = PollVote.objects.get(id_hash=1)
+        self.assertEqual([self.p4_op1_id], [x.id for x in vote.poll_options.all()])
+
     def test_recent_poll_empty(self):
         response = self.client.post("/portal/votes/recent/", {"id_hash": 1})
         res_json = json.loads(response.content)
@@ -380,6 +533,50 @@ class TestPollVotes(TestCase):
         self.assertEquals(2, len(res_json))
         self.assertGreater(res_json[0]["id"], res_json[1]["id"])
 
+    def test_demographic_breakdown_query(self):
+        year = TargetPopulation.objects.get(population="2024")
+        other_year = TargetPopulation.objects.get(population="2025")
+        major = TargetPopulation.objects.get(population="Computer Science, BSE")
+        options = list(PollOption.objects.filter(poll_id=self.p1_id).order_by("id"))
+        for i, populations in enumerate([[year, major], [year, major], [other_year], []]):
+            vote = PollVote.objects.create(id_hash=i, poll_id=self.p1_id)
+            vote.poll_options.set([options[0]] if populations else options[:2])
+            vote.target_populations.set(populations)
+
+        with self.assertNumQueries(1):
+            breakdown = get_demographic_breakdown(self.p1_id)
+        self.assertEqual(
+            [
+                {
+                    "option": options[0].choice,
+                    "breakdown": {
+                        "YEAR": {"2024": 2, "2025": 1},
+                        "MAJOR": {"Computer Science, BSE": 2},
+                    },
+                },
+                {"option": options[1].choice, "breakdown": {}},
+                {"option": options[2].choice, "breakdown": {}},
+            ],
+            breakdown,
+        )
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_demographic_breakdown_cached(self):
+        cache.clear()
+        year = TargetPopulation.objects.get(population="2024")
+        get_demographic_breakdown(self.p1_id)
+        with self.assertNumQueries(0):
+            self.assertEqual({}, get_demographic_breakdown(self.p1_id)[0]["breakdown"])
+
+        # casting a vote invalidates the breakdown
+        with self.captureOnCommitCallbacks(execute=True):
+            vote = PollVote.objects.create(id_hash=1, poll_id=self.p1_id)
+            vote.poll_options.set([self.p1_op1_id])
+            vote.target_populations.set([year])
+        breakdown = get_demographic_breakdown(self.p1_id)
+        self.assertEqual({"YEAR": {"2024": 1}}, breakdown[0]["breakdown"])
+        cache.clear()
+
     @mock.patch("portal.logic.get_user_info", mock_get_user_info)
     @mock.patch("portal.permissions.get_user_clubs", mock_get_user_clubs)
     def test_demographic_breakdown(self):
@@ -4,7 +4,9 @@ from unittest import mock
 
 from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from rest_framework.test import APIClient
 
@@ -195,3 +197,40 @@ class TestPosts(TestCase):
 
         self.assertEqual(mock_send_email.call_count, 2)
         self.assertEqual(mock_send_email.call_args[0][1], [post.creator.email])
+
+    def test_list_num_queries(self):
+        admin = User.objects.create_superuser("admin@upenn.edu", "admin", "admin")
+        populations = list(TargetPopulation.objects.all())
+
+        def list_queries():
+            results = []
+            for user, url in [
+                (self.test_user, "/portal/posts/browse/"),
+                (admin, "/portal/posts/review/"),
+            ]:
+                self.client.force_authenticate(user=user)
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                results.append((len(queries), len(json.loads(response.content))))
+            return results
+
+        def add_posts(count):
+            for i in range(count):
+                for status in [Post.STATUS_APPROVED, Post.STATUS_DRAFT]:
+                    post = Post.objects.create(
+                        club_code="pennlabs",
+                        title=f"Post {i}",
+                        subtitle="Subtitle",
+                        expire_date=timezone.localtime() + datetime.timedelta(days=1),
+                        status=status,
+                    )
+                    post.target_populations.set(populations)
+
+        add_posts(1)
+        before = list_queries()
+        add_posts(5)
+        after = list_queries()
+
+        # more results, same number of queries
+        self.assertEqual([(2, 7), (1, 6)], [(b[1], a[1]) for b, a in zip(before, after)])
+        self.assertEqual([b[0] for b in before], [a[0] for a in after])
@@ -0,0 +1,59 @@
+import threading
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from utils.cache import get_or_set_coalesced
+
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class GetOrSetCoalescedTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_cached(self):
+        default = mock.Mock(return_value="value")
+        self.assertEqual("value", get_or_set_coalesced("key", default, 60))
+        self.assertEqual("value", get_or_set_coalesced("key", default, 60))
+        default.assert_called_once()
+        self.assertIsNone(cache.get("key:lock"))
+
+    def test_waits_for_lock_holder(self):
+        cache.add("key:lock", True)
+        default = mock.Mock(return_value="mine")
+
+        # another worker fills the cache while we wait on its lock
+        timer = threading.Timer(0.1, lambda: cache.set("key", "theirs"))
+        timer.start()
+        self.assertEqual("theirs", get_or_set_coalesced("key", default, 60, lock_timeout=2))
+        timer.join()
+        default.assert_not_called()
+
+    def test_lock_holder_failed(self):
+        cache.add("key:lock", True)
+        default = mock.Mock(return_value="mine")
+
+        # the lock is released without the cache being filled
+        timer = threading.Timer(0.1, lambda: cache.delete("key:lock"))
+        timer.start()
+        self.assertEqual("mine", get_or_set_coalesced("key", default, 60, lock_timeout=2))
+        timer.join()
+        default.assert_called_once()
+
+    def test_lock_timeout(self):
+        cache.add("key:lock", True)
+        default = mock.Mock(return_value="mine")
+        self.assertEqual("mine", get_or_set_coalesced("key", default, 60, lock_timeout=0.1))
+        default.assert_called_once()
+
+    def test_default_error_releases_lock(self):
+        with self.assertRaises(ValueError):
+            get_or_set_coalesced("key", mock.Mock(side_effect=ValueError), 60)
+        self.assertIsNone(cache.get("key:lock"))
@@ -0,0 +1,31 @@
+from unittest.mock import patch
+
+import requests
+from django.test import TestCase
+
+from utils import http
+
+
+class PooledSessionTestCase(TestCase):
+    def test_session_reused(self):
+        self.assertIs(http.get_session(), http.get_session())
+
+    def test_host_pool_sizes(self):
+        session = http.get_session()
+        for prefix, maxsize in http.HOST_POOL_MAXSIZE.items():
+            self.assertEqual(maxsize, session.get_adapter(f"{prefix}/path")._pool_maxsize)
+        self.assertEqual(
+            http.POOL_MAXSIZE, session.get_adapter("https://pennlabs.org")._pool_maxsize
+        )
+
+    @patch("requests.Session.request")
+    def test_default_timeout(self, mock_request):
+        http.get("https://pennlabs.org")
+        self.assertEqual(http.DEFAULT_TIMEOUT, mock_request.call_args.kwargs["timeout"])
+
+        http.post("https://pennlabs.org", timeout=60)
+        self.assertEqual(60, mock_request.call_args.kwargs["timeout"])
+
+    def test_cookies_not_stored(self):
+        cookie = requests.cookies.create_cookie("sessionid", "secret", domain="pennlabs.org")
+        self.assertFalse(http.NoCookiesPolicy().set_ok(cookie, None))
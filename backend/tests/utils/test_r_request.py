@@ -16,13 +16,13 @@ class RRequestTestCase(TestCase):
         self.json = {"data": "data"}
         self.rrequest = RRequest()
 
-    @patch("requests.request")
+    @patch("utils.http.request")
     def test_successful_request(self, mock_response):
         mock_response.return_value.status_code = 200
         response = self.rrequest.request("get", self.url)
         self.assertEqual(200, response.status_code)
 
-    @patch("requests.request")
+    @patch("utils.http.request")
     def test_unsuccessful_request(self, mock_response):
         mock_response.return_value.status_code = 400
         mock_response.return_value.content = "Bad Error"
@@ -30,38 +30,38 @@ class RRequestTestCase(TestCase):
         self.assertEqual(400, response.status_code)
         self.assertEqual("Bad Error", response.content)
 
-    @patch("requests.request")
+    @patch("utils.http.request")
     def test_bad_json(self, mock_response):
         mock_response.return_value.status_code = 200
         mock_response.return_value.json = raise_decode_error
         response = self.rrequest.delete(self.url, json=self.json)
         self.assertEqual(200, response.status_code)
 
-    @patch("requests.request")
+    @patch("utils.http.request")
     def test_get_request(self, mock_response):
         mock_response.return_value.status_code = 200
         response = self.rrequest.get(self.url)
         self.assertEqual(200, response.status_code)
 
-    @patch("requests.request")
+    @patch("utils.http.request")
     def test_post_request(self, mock_response):
         mock_response.return_value.status_code = 200
         response = self.rrequest.post(self.url, json=self.json)
         self.assertEqual(200, response.status_code)
 
-    @patch("requests.request")
+    @patch("utils.http.request")
     def test_patch_request(self, mock_response):
         mock_response.return_value.status_code = 200
         response = self.rrequest.patch(self.url)
         self.assertEqual(200, response.status_code)
 
-    @patch("requests.request")
+    @patch("utils.http.request")
     def test_put_request(self, mock_response):
         mock_response.return_value.status_code = 200
         response = self.rrequest.put(self.url, json=self.json)
         self.assertEqual(200, response.status_code)
 
-    @patch("requests.request")
+    @patch("utils.http.request")
     def test_delete_request(self, mock_response):
         mock_response.return_value.status_code = 200
         response = self.rrequest.delete(self.url, json=self.json)
@@ -0,0 +1,80 @@
+import datetime
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from utils.tokens import TOKEN_REFRESH_MARGIN, SharedTokenMixin
+
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class Wrapper(SharedTokenMixin):
+    token_cache_key = "tests:token"
+
+    def __init__(self, fetch_token):
+        self.token = None
+        self.expiration = timezone.localtime()
+        self.fetch_token = fetch_token
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SharedTokenTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.fetch_token = mock.Mock(side_effect=[("first", 3600), ("second", 3600)])
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_token_reused(self):
+        wrapper = Wrapper(self.fetch_token)
+        wrapper.update_token()
+        wrapper.update_token()
+        self.assertEqual("first", wrapper.token)
+        self.fetch_token.assert_called_once()
+
+    def test_token_shared(self):
+        Wrapper(self.fetch_token).update_token()
+
+        # a new process starts out without a token of its own
+        wrapper = Wrapper(mock.Mock())
+        wrapper.update_token()
+        self.assertEqual("first", wrapper.token)
+        wrapper.fetch_token.assert_not_called()
+
+    def test_refreshed_early(self):
+        wrapper = Wrapper(self.fetch_token)
+        wrapper.update_token()
+        expiration = wrapper.expiration
+
+        # still valid, but about to expire
+        with mock.patch(
+            "django.utils.timezone.localtime",
+            return_value=expiration - TOKEN_REFRESH_MARGIN + datetime.timedelta(seconds=1),
+        ):
+            wrapper.update_token()
+        self.assertEqual("second", wrapper.token)
+
+    def test_refresh_locked(self):
+        wrapper = Wrapper(self.fetch_token)
+        wrapper.update_token()
+        cache.add("tests:token:lock", True)
+
+        # another process is refreshing, the current token is still valid so keep using it
+        with mock.patch(
+            "django.utils.timezone.localtime",
+            return_value=wrapper.expiration - datetime.timedelta(seconds=1),
+        ):
+            wrapper.update_token()
+        self.assertEqual("first", wrapper.token)
+        self.fetch_token.assert_called_once()
+
+    def test_fetch_error(self):
+        wrapper = Wrapper(mock.Mock(side_effect=ValueError))
+        with self.assertRaises(ValueError):
+            wrapper.update_token()
+        # the lock is released for the next attempt
+        self.assertIsNone(cache.get("tests:token:lock"))
@@ -0,0 +1,53 @@
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from wrapped.models import GlobalStat, IndividualStat, IndividualStatKey, Semester
+
+
+User = get_user_model()
+
+
+class TestLoadWrappedStats(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("user", "user@a.com", "user")
+        self.other = User.objects.create_user("other", "other@a.com", "other")
+
+    def load(self, rows, *args):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as f:
+            f.write("\n".join(rows))
+            f.flush()
+            out = StringIO()
+            call_command("load_wrapped_stats", f.name, "2024A", *args, stdout=out)
+        return out.getvalue()
+
+    def test_individual(self):
+        rows = [
+            "pennkey,key,value",
+            "user,steps,100",
+            "other,steps,200",
+            "user,laundry,3",
+            "nobody,steps,5",
+        ]
+        out = self.load(rows, "--chunk-size", "2")
+        self.assertIn("skipped 1 rows with unknown pennkeys!", out)
+
+        self.assertEqual(3, IndividualStat.objects.count())
+        self.assertEqual(2, IndividualStatKey.objects.count())
+        self.assertEqual("200", IndividualStat.objects.get(user=self.other, key_id="steps").value)
+
+        # re-running overwrites values instead of adding rows
+        self.load(["pennkey,key,value", "user,steps,150", "user,steps,175"])
+        self.assertEqual(3, IndividualStat.objects.count())
+        self.assertEqual("175", IndividualStat.objects.get(user=self.user, key_id="steps").value)
+
+    def test_global(self):
+        self.load(["key,value", "total_steps,300", "total_laundry,3"], "--global")
+        self.load(["key,value", "total_steps,400"], "--global")
+
+        semester = Semester.objects.get(semester="2024A")
+        self.assertEqual(2, GlobalStat.objects.filter(semester=semester).count())
+        self.assertEqual("400", GlobalStat.objects.get(key_id="total_steps").value)
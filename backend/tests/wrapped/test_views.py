@@ -0,0 +1,79 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from wrapped.models import (
+    GlobalStat,
+    GlobalStatKey,
+    GlobalStatPageField,
+    IndividualStat,
+    IndividualStatKey,
+    IndividualStatPageField,
+    Page,
+    Semester,
+)
+
+
+User = get_user_model()
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestSemesterView(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user("user", "user@a.com", "user")
+        self.client.force_authenticate(user=self.user)
+
+        self.semester = Semester.objects.create(semester="2024A")
+        for i in range(5):
+            page = Page.objects.create(name=f"page{i}", template_path=f"page{i}.html")
+            self.semester.pages.add(page)
+            individual_key = IndividualStatKey.objects.create(key=f"individual{i}")
+            global_key = GlobalStatKey.objects.create(key=f"global{i}")
+            IndividualStatPageField.objects.create(
+                individual_stat_key=individual_key, page=page, text_field_name=f"mine{i}"
+            )
+            GlobalStatPageField.objects.create(
+                global_stat_key=global_key, page=page, text_field_name=f"everyone{i}"
+            )
+            IndividualStat.objects.create(
+                user=self.user, key=individual_key, value=str(i), semester=self.semester
+            )
+            GlobalStat.objects.create(key=global_key, value=str(10 * i), semester=self.semester)
+
+    def tearDown(self):
+        cache.clear()
+
+    def get_semester(self):
+        response = self.client.get(reverse("semester-detail", args=[self.semester.semester]))
+        return json.loads(response.content)
+
+    def test_get(self):
+        # semester, pages, individual and global page fields, individual and global stats
+        with self.assertNumQueries(6):
+            res_json = self.get_semester()
+
+        self.assertEqual("2024A", res_json["semester"])
+        self.assertEqual(5, len(res_json["pages"]))
+        stats = {page["name"]: page["combined_stats"] for page in res_json["pages"]}
+        self.assertEqual({"mine3": "3", "everyone3": "30"}, stats["page3"])
+
+        # global stats are cached per semester
+        with self.assertNumQueries(5):
+            self.get_semester()
+
+    def test_global_stats_invalidated(self):
+        self.get_semester()
+        stat = GlobalStat.objects.get(key_id="global1")
+        stat.value = "saved"
+        stat.save()
+
+        stats = {page["name"]: page["combined_stats"] for page in self.get_semester()["pages"]}
+        self.assertEqual("saved", stats["page1"]["everyone1"])
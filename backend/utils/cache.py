@@ -1,5 +1,8 @@
+import time
 from enum import IntEnum
 
+from django.core.cache import cache
+
 
 class Cache(IntEnum):
     MINUTE = 60
@@ -7,3 +10,47 @@ class Cache(IntEnum):
     DAY = 24 * HOUR
     MONTH = 30 * DAY
     YEAR = 365 * DAY
+
+
+def get_or_set_coalesced(key, default, timeout, lock_timeout=10, poll_interval=0.05):
+    """
+    Like cache.get_or_set, but when several workers miss the same key at once, only one
+    of them calls `default` while the others wait for it to fill the cache.
+
+    `default` must not return None. If the worker holding the lock fails or takes longer
+    than `lock_timeout` seconds, the waiting workers call `default` themselves.
+    """
+    if (value := cache.get(key)) is not None:
+        return value
+
+    lock_key = f"{key}:lock"
+    if cache.add(lock_key, True, lock_timeout):
+        try:
+            value = default()
+            cache.set(key, value, timeout)
+            return value
+        finally:
+            cache.delete(lock_key)
+
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        time.sleep(poll_interval)
+        if (value := cache.get(key)) is not None:
+            return value
+        if cache.get(lock_key) is None:
+            # lock holder failed without filling the cache, try again from scratch
+            break
+    return default()
+
+
+def get_version(key):
+    """Returns the current version of a family of cache keys"""
+    return cache.get_or_set(f"{key}:version", 0, None)
+
+
+def bump_version(key):
+    """Invalidates every cache key built with the previous version of `key`"""
+    try:
+        cache.incr(f"{key}:version")
+    except ValueError:
+        cache.set(f"{key}:version", 1, None)
@@ -0,0 +1,114 @@
+"""
+Shared, per-process connection pool for talking to upstream APIs
+
+Module level requests.get/post/request open a new TCP + TLS connection on every call.
+The functions here have the same signatures, but reuse keep-alive connections, apply a
+default timeout and retry connection errors and gateway errors with backoff.
+"""
+
+import os
+import threading
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from accounts.ipc import _refresh_access_token
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# (connect, read) seconds, used when the caller doesn't pass a timeout
+DEFAULT_TIMEOUT = (5, 30)
+
+POOL_MAXSIZE = 10
+# hosts that we hit concurrently (availability fan-out, laundry polling) get larger pools
+HOST_POOL_MAXSIZE = {
+    "https://api2.libcal.com": 20,
+    "https://apps.wharton.upenn.edu": 20,
+    "https://api.alliancelslabs.com": 20,
+}
+
+# only idempotent methods are retried on these statuses, POSTs are never sent twice
+RETRY = Retry(
+    total=2,
+    connect=2,
+    read=0,
+    backoff_factor=0.3,
+    status_forcelist=[502, 503, 504],
+    raise_on_status=False,
+)
+
+
+class NoCookiesPolicy(DefaultCookiePolicy):
+    """The session is shared between users, so never store cookies sent back to us"""
+
+    def set_ok(self, cookie, request):
+        return False
+
+
+class PooledSession(requests.Session):
+    def __init__(self):
+        super().__init__()
+        self.cookies.set_policy(NoCookiesPolicy())
+        self.mount("https://", HTTPAdapter(pool_maxsize=POOL_MAXSIZE, max_retries=RETRY))
+        self.mount("http://", HTTPAdapter(pool_maxsize=POOL_MAXSIZE, max_retries=RETRY))
+        for prefix, maxsize in HOST_POOL_MAXSIZE.items():
+            self.mount(prefix, HTTPAdapter(pool_maxsize=maxsize, max_retries=RETRY))
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = DEFAULT_TIMEOUT
+        return super().request(method, url, **kwargs)
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Returns the session for this process. Keyed by pid so that workers forked after
+    import never share sockets with their parent.
+    """
+    pid = os.getpid()
+    if (session := _sessions.get(pid)) is None:
+        with _sessions_lock:
+            session = _sessions.setdefault(pid, PooledSession())
+    return session
+
+
+def request(method, url, **kwargs):
+    return get_session().request(method, url, **kwargs)
+
+
+def get(url, params=None, **kwargs):
+    return request("GET", url, params=params, **kwargs)
+
+
+def post(url, data=None, json=None, **kwargs):
+    return request("POST", url, data=data, json=json, **kwargs)
+
+
+def ensure_access_token(user):
+    """
+    Refreshes the user's access token if it expired, returns False if that failed.
+    Call this before sending authenticated requests for the same user from several threads,
+    so that they don't all refresh the token at once.
+    """
+    return user.accesstoken.expires_at >= timezone.now() or _refresh_access_token(user)
+
+
+def authenticated_request(user, method, url, **kwargs):
+    """
+    accounts.ipc.authenticated_request over the shared pool. Same caveat applies: only
+    ever use this for Penn Labs products, since it sends the user's access token.
+    """
+    if not ensure_access_token(user):
+        # mirror accounts.ipc, act as if the user didn't have access to the resource
+        response = requests.models.Response()
+        response.status_code = 403
+        return response
+
+    headers = kwargs.pop("headers", None) or {}
+    headers["Authorization"] = f"Bearer {user.accesstoken.token}"
+    return request(method, url, headers=headers, **kwargs)
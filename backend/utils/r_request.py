@@ -3,6 +3,8 @@ from json.decoder import JSONDecodeError
 
 import requests
 
+from utils import http
+
 
 class Method(str, Enum):
     POST = "post"
@@ -62,7 +64,7 @@ class RRequest:
         response = self.__default_response()
 
         for _ in range(self.num_retries):
-            response = requests.request(
+            response = http.request(
                 method,
                 url,
                 params=params,
@@ -0,0 +1,88 @@
+"""
+OAuth client credentials tokens shared between every worker and process through the cache
+"""
+
+import datetime
+import threading
+import time
+
+from django.core.cache import cache
+from django.utils import timezone
+
+
+# tokens are refreshed this long before they expire (or a fifth of their lifetime if shorter)
+TOKEN_REFRESH_MARGIN = datetime.timedelta(minutes=5)
+# how long a process may hold the refresh lock before the others give up waiting on it
+TOKEN_LOCK_TIMEOUT = 10
+
+
+class SharedTokenMixin:
+    """
+    Keeps an API wrapper's bearer token in the cache, so that a token fetched by one process
+    is used by all of them.
+
+    Subclasses set `token_cache_key`, implement `fetch_token` and start with `token` and
+    `expiration` attributes. Every process uses its own copy of the token until that copy is
+    about to expire, and only then looks at the cache. A single process at a time fetches a
+    new token, ahead of the expiry, while the others keep using the current one.
+    """
+
+    token_cache_key = None
+    token_refresh_margin = datetime.timedelta(0)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # the token is shared by every instance, so is the lock around refreshing it
+        cls.token_lock = threading.Lock()
+
+    def fetch_token(self):
+        """Returns a new access token and the number of seconds it is valid for"""
+        raise NotImplementedError
+
+    def token_due(self):
+        return self.expiration - self.token_refresh_margin <= timezone.localtime()
+
+    def use_cached_token(self):
+        if (cached := cache.get(self.token_cache_key)) is not None:
+            self.token, self.expiration, self.token_refresh_margin = cached
+        return not self.token_due()
+
+    def update_token(self):
+        # does not get new token if the current one is still usable
+        if not self.token_due():
+            return
+        with self.token_lock:
+            # another thread or process may have refreshed the token already
+            if not self.token_due() or self.use_cached_token():
+                return
+
+            lock_key = f"{self.token_cache_key}:lock"
+            locked = cache.add(lock_key, True, TOKEN_LOCK_TIMEOUT)
+            if not locked:
+                # someone else is refreshing it, carry on with the current token if we can
+                if self.expiration > timezone.localtime() or self.wait_for_token(lock_key):
+                    return
+            try:
+                token, expires_in = self.fetch_token()
+                lifetime = datetime.timedelta(seconds=expires_in)
+                self.token = token
+                self.expiration = timezone.localtime() + lifetime
+                self.token_refresh_margin = min(TOKEN_REFRESH_MARGIN, lifetime / 5)
+                cache.set(
+                    self.token_cache_key,
+                    (self.token, self.expiration, self.token_refresh_margin),
+                    expires_in,
+                )
+            finally:
+                if locked:
+                    cache.delete(lock_key)
+
+    def wait_for_token(self, lock_key, poll_interval=0.05):
+        """Waits for the process holding `lock_key` to cache a new token"""
+        deadline = time.monotonic() + TOKEN_LOCK_TIMEOUT
+        while time.monotonic() < deadline and cache.get(lock_key) is not None:
+            time.sleep(poll_interval)
+            if self.use_cached_token():
+                return True
+        # the lock holder is done, or failed and we fetch the token ourselves
+        return self.use_cached_token()
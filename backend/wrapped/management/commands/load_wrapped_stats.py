@@ -0,0 +1,99 @@
+import time
+
+import pandas as pd
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from wrapped.models import (
+    GLOBAL_STATS_CACHE_KEY,
+    GlobalStat,
+    GlobalStatKey,
+    IndividualStat,
+    IndividualStatKey,
+    Semester,
+)
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = """
+    Loads Wrapped stats for a semester from a CSV or Parquet file, in chunks.
+    Individual stats have pennkey, key and value columns, global stats have key and value.
+    Existing stats are overwritten, so a load can be re-run.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=str, help="CSV or Parquet file to load")
+        parser.add_argument("semester", type=str, help="semester, e.g. 2024A")
+        parser.add_argument(
+            "--global", action="store_true", dest="is_global", help="load global stats"
+        )
+        parser.add_argument("--chunk-size", type=int, default=10000, help="rows per upsert")
+
+    def read_chunks(self, path, chunk_size):
+        """Yields the file as DataFrames of string columns, without reading it all in"""
+        if path.endswith(".parquet"):
+            try:
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise CommandError("pyarrow is required to load Parquet files")
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+                yield batch.to_pandas().astype(str)
+        else:
+            yield from pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False)
+
+    def handle(self, *args, **kwargs):
+        is_global = kwargs["is_global"]
+        semester, _ = Semester.objects.get_or_create(semester=kwargs["semester"])
+        model, key_model = (
+            (GlobalStat, GlobalStatKey) if is_global else (IndividualStat, IndividualStatKey)
+        )
+        unique_fields = ["key", "semester"] if is_global else ["key", "semester", "user"]
+
+        # map pennkeys to user ids once, instead of a query per row
+        user_ids = {} if is_global else dict(User.objects.values_list("username", "id"))
+        known_keys = set(key_model.objects.values_list("key", flat=True))
+
+        loaded = skipped = 0
+        start = time.monotonic()
+        for chunk in self.read_chunks(kwargs["path"], kwargs["chunk_size"]):
+            # the last row wins, a row can't be upserted twice in one statement
+            stats = {}
+            for row in chunk.itertuples(index=False):
+                if is_global:
+                    stats[row.key] = GlobalStat(key_id=row.key, value=row.value, semester=semester)
+                elif (user_id := user_ids.get(row.pennkey)) is None:
+                    skipped += 1
+                else:
+                    stats[(user_id, row.key)] = IndividualStat(
+                        user_id=user_id, key_id=row.key, value=row.value, semester=semester
+                    )
+
+            if new_keys := {stat.key_id for stat in stats.values()} - known_keys:
+                key_model.objects.bulk_create(
+                    [key_model(key=key) for key in new_keys], ignore_conflicts=True
+                )
+                known_keys |= new_keys
+
+            model.objects.bulk_create(
+                stats.values(),
+                update_conflicts=True,
+                update_fields=["value"],
+                unique_fields=unique_fields,
+            )
+
+            loaded += len(stats)
+            elapsed = time.monotonic() - start
+            self.stdout.write(f"{loaded} stats loaded, {loaded / elapsed:.0f} stats/s")
+
+        if is_global:
+            # bulk_create doesn't send post_save, see wrapped.models.invalidate_global_stats
+            cache.delete(GLOBAL_STATS_CACHE_KEY.format(semester=semester.pk))
+
+        self.stdout.write(
+            f"Loaded {loaded} stats in {time.monotonic() - start:.1f}s, "
+            f"skipped {skipped} rows with unknown pennkeys!"
+        )
@@ -1,11 +1,19 @@
 from datetime import timedelta
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from utils.cache import Cache
 
 
 User = get_user_model()
 
+GLOBAL_STATS_CACHE_KEY = "wrapped:global_stats:{semester}"
+GLOBAL_STATS_CACHE_TIMEOUT = Cache.DAY
+
 
 class StatKey(models.Model):
     key = models.CharField(max_length=50, primary_key=True, null=False, blank=False)
@@ -57,6 +65,28 @@ class IndividualStat(models.Model):
         return f"User: {self.user} -- {self.key}-{str(self.semester)} : {self.value}"
 
 
+def load_individual_stats(user, semester):
+    """Returns every stat of the user for the semester as {key: value}, in one query"""
+    return dict(
+        IndividualStat.objects.filter(user=user, semester=semester).values_list("key_id", "value")
+    )
+
+
+def load_global_stats(semester):
+    """Returns every global stat of the semester as {key: value}, cached per semester"""
+    key = GLOBAL_STATS_CACHE_KEY.format(semester=semester.pk)
+    if (stats := cache.get(key)) is None:
+        stats = dict(GlobalStat.objects.filter(semester=semester).values_list("key_id", "value"))
+        cache.set(key, stats, GLOBAL_STATS_CACHE_TIMEOUT)
+    return stats
+
+
+@receiver(post_save, sender=GlobalStat)
+@receiver(post_delete, sender=GlobalStat)
+def invalidate_global_stats(sender, instance, **kwargs):
+    cache.delete(GLOBAL_STATS_CACHE_KEY.format(semester=instance.semester_id))
+
+
 class Page(models.Model):
 
     name = models.CharField(max_length=50, primary_key=True, null=False, blank=False)
@@ -78,7 +108,10 @@ class IndividualStatPageField(models.Model):
     page = models.ForeignKey(Page, null=False, blank=False, on_delete=models.CASCADE)
     text_field_name = models.CharField(max_length=50, null=False, blank=False)
 
-    def get_value(self, user, semester):
+    def get_value(self, user, semester, stats=None):
+        """`stats` maps key to value for the user and semester, see load_individual_stats"""
+        if stats is not None:
+            return stats.get(self.individual_stat_key_id)
         return (
             IndividualStat.objects.filter(
                 user=user, key=self.individual_stat_key, semester=semester
@@ -98,7 +131,10 @@ class GlobalStatPageField(models.Model):
     page = models.ForeignKey(Page, null=False, blank=False, on_delete=models.CASCADE)
     text_field_name = models.CharField(max_length=50, null=False, blank=False)
 
-    def get_value(self, _user, semester):
+    def get_value(self, _user, semester, stats=None):
+        """`stats` maps key to value for the semester, see load_global_stats"""
+        if stats is not None:
+            return stats.get(self.global_stat_key_id)
         return (
             GlobalStat.objects.filter(key=self.global_stat_key.key, semester=semester).first().value
         )
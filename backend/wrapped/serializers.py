@@ -1,10 +1,19 @@
 from rest_framework import serializers
 
-from wrapped.models import GlobalStatPageField, IndividualStatPageField, Page, Semester
+from wrapped.models import (
+    GlobalStatPageField,
+    IndividualStatPageField,
+    Page,
+    Semester,
+    load_global_stats,
+    load_individual_stats,
+)
 
 
 class PageFieldSerializer(serializers.ModelSerializer):
     stat_value = serializers.SerializerMethodField()
+    # context entry with the preloaded stats for this kind of field, if any
+    stats_context = None
 
     class Meta:
         abstract = True
@@ -13,15 +22,19 @@ class PageFieldSerializer(serializers.ModelSerializer):
     def get_stat_value(self, obj):
         user = self.context.get("user")
         semester = self.context.get("semester")
-        return obj.get_value(user, semester)
+        return obj.get_value(user, semester, self.context.get(self.stats_context))
 
 
 class IndividualStatPageFieldSerializer(PageFieldSerializer):
+    stats_context = "individual_stats"
+
     class Meta(PageFieldSerializer.Meta):
         model = IndividualStatPageField
 
 
 class GlobalStatPageFieldSerializer(PageFieldSerializer):
+    stats_context = "global_stats"
+
     class Meta(PageFieldSerializer.Meta):
         model = GlobalStatPageField
 
@@ -37,17 +50,13 @@ class PageSerializer(serializers.ModelSerializer):
     def get_combined_stats(self, obj):
         if not (semester := self.context.get("semester", obj)):
             return {}
-        user = self.context.get("user")
+        context = {**self.context, "semester": semester}
         individual_stat_fields = IndividualStatPageFieldSerializer(
-            obj.individualstatpagefield_set.all(),
-            context={"semester": semester, "user": user},
-            many=True,
+            obj.individualstatpagefield_set.all(), context=context, many=True
         ).data
 
         global_stat_fields = GlobalStatPageFieldSerializer(
-            obj.globalstatpagefield_set.all(),
-            context={"semester": semester, "user": user},
-            many=True,
+            obj.globalstatpagefield_set.all(), context=context, many=True
         ).data
 
         field_list = individual_stat_fields + global_stat_fields
@@ -64,6 +73,12 @@ class SemesterSerializer(serializers.ModelSerializer):
 
     def get_pages(self, obj):
         user = self.context.get("user")
-        return PageSerializer(
-            obj.pages.all(), many=True, context={"semester": obj, "user": user}
-        ).data
+        # every stat on every page is read from these, instead of a query per field
+        context = {
+            "semester": obj,
+            "user": user,
+            "individual_stats": load_individual_stats(user, obj),
+            "global_stats": load_global_stats(obj),
+        }
+        pages = obj.pages.prefetch_related("individualstatpagefield_set", "globalstatpagefield_set")
+        return PageSerializer(pages, many=True, context=context).data
@@ -106,6 +106,22 @@ export class MyChart extends PennLabsChart {
       env: [{ name: "DJANGO_SETTINGS_MODULE", value: "pennmobile.settings.production" }]
     });
 
+    new CronJob(this, 'refresh-laundry-status', {
+      schedule: cronTime.everyMinute(),
+      image: backendImage,
+      secret,
+      cmd: ["python", "manage.py", "refresh_laundry_status"],
+      env: [{ name: "DJANGO_SETTINGS_MODULE", value: "pennmobile.settings.production" }]
+    });
+
+    new CronJob(this, 'compact-laundry-snapshots', {
+      schedule: cronTime.everyDay(),
+      image: backendImage,
+      secret,
+      cmd: ["python", "manage.py", "compact_laundry_snapshots"],
+      env: [{ name: "DJANGO_SETTINGS_MODULE", value: "pennmobile.settings.production" }]
+    });
+
     // new CronJob(this, 'send-gsr-reminders', {
     //   schedule: "20,50 * * * *",
     //   image: backendImage,
@@ -122,11 +138,35 @@ export class MyChart extends PennLabsChart {
       env: [{ name: "DJANGO_SETTINGS_MODULE", value: "pennmobile.settings.production" }]
     });
 
-    new CronJob(this, 'load-dining-menus', {
+    new CronJob(this, 'refresh-homepage', {
+      schedule: cronTime.every(15).minutes(),
+      image: backendImage,
+      secret,
+      cmd: ["python", "manage.py", "refresh_homepage"],
+      env: [{ name: "DJANGO_SETTINGS_MODULE", value: "pennmobile.settings.production" }]
+    });
+
+    new CronJob(this, 'compact-fitness-snapshots', {
       schedule: cronTime.everyDay(),
       image: backendImage,
       secret,
-      cmd: ["python", "manage.py", "load_next_menu"],
+      cmd: ["python", "manage.py", "compact_fitness_snapshots"],
+      env: [{ name: "DJANGO_SETTINGS_MODULE", value: "pennmobile.settings.production" }]
+    });
+
+    new CronJob(this, 'load-dining-menus', {
+      schedule: cronTime.every(6).hours(),
+      image: backendImage,
+      secret,
+      cmd: ["python", "manage.py", "sync_menus"],
+      env: [{ name: "DJANGO_SETTINGS_MODULE", value: "pennmobile.settings.production" }]
+    });
+
+    new CronJob(this, 'refresh-dining-venues', {
+      schedule: cronTime.everyHour(),
+      image: backendImage,
+      secret,
+      cmd: ["python", "manage.py", "refresh_venues"],
       env: [{ name: "DJANGO_SETTINGS_MODULE", value: "pennmobile.settings.production" }]
     });
 